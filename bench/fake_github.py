@@ -0,0 +1,79 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    repos_per_org = 5
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, resource='core'):
+        data = json.dumps(body).encode('utf-8')
+        self.server.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-RateLimit-Resource', resource)
+        self.send_header('X-RateLimit-Limit', '5000')
+        self.send_header('X-RateLimit-Remaining', '4999')
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _repos(self, org):
+        return [{
+            'name': f'repo{i}',
+            'full_name': f'{org}/repo{i}',
+            'html_url': f'https://github.com/{org}/repo{i}',
+            'clone_url': f'https://github.com/{org}/repo{i}.git',
+            'size': 1000 * (i + 1),
+            'pushed_at': '2026-01-01T00:00:00Z',
+            'fork': False
+        } for i in range(self.repos_per_org)]
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')
+        if url.path == '/search/users':
+            name = query.get('q', [''])[0].split(' ')[0]
+            items = [{'login': name, 'type': 'Organization'}, {'login': f'{name}-labs', 'type': 'Organization'}]
+            return self._send(200, {'total_count': len(items), 'items': items}, 'search')
+        if len(parts) == 2 and parts[0] == 'orgs':
+            return self._send(200, {'login': parts[1], 'public_repos': self.repos_per_org})
+        if len(parts) == 3 and parts[0] == 'orgs' and parts[2] == 'repos':
+            page = int(query.get('page', ['1'])[0])
+            return self._send(200, self._repos(parts[1]) if page == 1 else [])
+        self._send(404, {'message': 'Not Found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        query = json.loads(self.rfile.read(length) or b'{}').get('query', '')
+        data = {
+            alias: {
+                'login': login,
+                'repositories': {'totalCount': self.repos_per_org, 'totalDiskUsage': 1000 * self.repos_per_org},
+                'forks': {'totalCount': 0}
+            }
+            for alias, login in re.findall(r'(\w+): organization\(login: "([^"]+)"\)', query)
+        }
+        self._send(200, {'data': data}, 'graphql')
+
+
+def start_server(repos_per_org=5, latency=0.0):
+    handler = type('Handler', (FakeGitHubHandler,), {'repos_per_org': repos_per_org, 'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    server.calls = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
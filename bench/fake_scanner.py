@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import json
+import os
+import sys
+import time
+
+FINDINGS = int(os.getenv('BENCH_FINDINGS', '10'))
+RATE = float(os.getenv('BENCH_RATE', '0'))
+STARTUP = float(os.getenv('BENCH_STARTUP', '0'))
+
+
+def _arg(prefix):
+    for index, arg in enumerate(sys.argv):
+        if arg.startswith(prefix + '='):
+            return arg.split('=', 1)[1]
+        if arg == prefix and index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return None
+
+def _pace(index, started):
+    if RATE:
+        delay = started + index / RATE - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+def trufflehog():
+    org = _arg('--org') or 'local'
+    started = time.time()
+    out = sys.stdout
+    for index in range(FINDINGS):
+        _pace(index, started)
+        out.write(json.dumps({
+            'SourceMetadata': {'Data': {'Github': {
+                'link': f'https://github.com/{org}/repo{index % 5}/blob/abc/config{index}.env#L{index}',
+                'repository': f'https://github.com/{org}/repo{index % 5}.git',
+                'commit': f'{index:040x}',
+                'email': 'dev@example.com',
+                'file': f'config{index}.env',
+                'timestamp': '2026-01-01 00:00:00 +0000',
+                'line': index
+            }}},
+            'SourceID': 1,
+            'SourceType': 7,
+            'SourceName': 'trufflehog - github',
+            'DetectorType': 2,
+            'DetectorName': 'AWS',
+            'DecoderName': 'PLAIN',
+            'Verified': True,
+            'Raw': f'AKIA{index:016d}',
+            'RawV2': f'AKIA{index:016d}:secret{index}',
+            'Redacted': 'AKIA****',
+            'ExtraData': {'account': '123456789012', 'arn': 'arn:aws:iam::123456789012:user/bench'}
+        }) + '\n')
+    out.flush()
+    return 0
+
+def kingfisher():
+    if len(sys.argv) > 1 and sys.argv[1] == 'update':
+        return 0
+    output = _arg('--output')
+    jsonl = _arg('--format') == 'jsonl'
+    started = time.time()
+    with open(output, 'w', encoding='utf-8') if output else sys.stdout as out:
+        if not jsonl:
+            out.write('[{"matches": [')
+        for index in range(FINDINGS):
+            _pace(index, started)
+            match = {
+                'rule': {'name': 'AWS API Key', 'id': 'kingfisher.aws.1'},
+                'finding': {
+                    'snippet': f'AKIA{index:016d}',
+                    'fingerprint': str(index),
+                    'confidence': 'medium',
+                    'entropy': '4.1',
+                    'validation': {'status': 'Active Credential', 'response': ''},
+                    'language': 'Unknown',
+                    'line': index,
+                    'column_start': 0,
+                    'column_end': 20,
+                    'path': f'config{index}.env',
+                    'git_metadata': {'repository_url': f'https://github.com/bench/repo{index % 5}.git'}
+                }
+            }
+            if jsonl:
+                out.write(json.dumps(match) + '\n')
+            else:
+                out.write((',' if index else '') + json.dumps(match))
+        if not jsonl:
+            out.write(']}]')
+    return 200 if FINDINGS else 0
+
+if __name__ == '__main__':
+    time.sleep(STARTUP)
+    name = os.path.basename(sys.argv[0])
+    if '--version' in sys.argv:
+        print(f'{name} 0.0.0-bench')
+        sys.exit(0)
+    sys.exit(trufflehog() if name.startswith('trufflehog') else kingfisher())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_github import start_server
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+SCENARIOS = {
+    'orgs-1': {'orgs': 1, 'findings': 100},
+    'orgs-100': {'orgs': 100, 'findings': 100},
+    'orgs-1000': {'orgs': 1000, 'findings': 10},
+    'findings-10k': {'orgs': 1, 'findings': 10000},
+    'findings-100k': {'orgs': 1, 'findings': 100000},
+    'findings-1m': {'orgs': 1, 'findings': 1000000}
+}
+QUICK = ['orgs-1', 'orgs-100', 'findings-10k']
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def _prepare(work_dir, orgs):
+    bin_dir = os.path.join(work_dir, 'bin')
+    os.makedirs(bin_dir)
+    for name in ('trufflehog', 'kingfisher'):
+        os.symlink(os.path.join(BENCH_DIR, 'fake_scanner.py'), os.path.join(bin_dir, name))
+    orglist = os.path.join(work_dir, 'orgs.txt')
+    with open(orglist, 'w', encoding='utf-8') as f:
+        f.write(''.join(f'bench-org-{i}\n' for i in range(orgs)))
+    return bin_dir, orglist
+
+def run_scenario(name, orgs, findings, jobs, extra_args, rate, startup, repos, api_latency, keep):
+    work_dir = tempfile.mkdtemp(prefix=f'ghoss-bench-{name}-')
+    server, url = start_server(repos_per_org=repos, latency=api_latency)
+    try:
+        bin_dir, orglist = _prepare(work_dir, orgs)
+        env = dict(
+            os.environ,
+            PATH=bin_dir + os.pathsep + os.environ.get('PATH', ''),
+            GITHUB_API_URL=url,
+            BENCH_FINDINGS=str(findings),
+            BENCH_RATE=str(rate),
+            BENCH_STARTUP=str(startup)
+        )
+        cmd = [sys.executable, os.path.join(REPO_DIR, 'main.py'), '-oL', orglist, '-y', '-j', str(jobs), '--no-cache'] + extra_args
+        started = time.perf_counter()
+        process = subprocess.Popen(cmd, cwd=work_dir, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        stderr = process.stderr.read()
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        wall = time.perf_counter() - started
+
+        latencies = []
+        output_dir = os.path.join(work_dir, 'ghoss', 'output')
+        for filename in os.listdir(output_dir) if os.path.isdir(output_dir) else []:
+            if filename.startswith('metrics_') and filename.endswith('.jsonl'):
+                with open(os.path.join(output_dir, filename), 'r', encoding='utf-8') as f:
+                    latencies.extend(json.loads(line)['wall_seconds'] for line in f if line.strip())
+
+        total_findings = orgs * findings * 2
+        return {
+            'scenario': name,
+            'organizations': orgs,
+            'findings_per_scanner': findings,
+            'jobs': jobs,
+            'exit_code': process.returncode,
+            'wall_seconds': round(wall, 3),
+            'orgs_per_second': round(orgs / wall, 2),
+            'findings_per_second': round(total_findings / wall, 1),
+            'org_latency_p50': round(_percentile(latencies, 50), 3),
+            'org_latency_p95': round(_percentile(latencies, 95), 3),
+            'org_latency_max': round(max(latencies, default=0.0), 3),
+            'org_latency_mean': round(statistics.mean(latencies), 3) if latencies else 0.0,
+            'peak_rss_mb': round(rusage.ru_maxrss / 1024, 1),
+            'cpu_seconds': round(rusage.ru_utime + rusage.ru_stime, 3),
+            'api_calls': server.calls,
+            'stderr_tail': stderr.decode('utf-8', 'replace').strip().splitlines()[-5:] if process.returncode else []
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+        if keep:
+            print(f'[ℹ] Kept working directory for {name}: {work_dir}')
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def print_row(result):
+    status = '[✓]' if result['exit_code'] == 0 else '[!]'
+    print(
+        f"{status} {result['scenario']:<14} orgs={result['organizations']:<5} findings={result['findings_per_scanner']:<8} "
+        f"wall={result['wall_seconds']:>8.2f}s  {result['orgs_per_second']:>8.2f} orgs/s  {result['findings_per_second']:>10.1f} findings/s  "
+        f"p50={result['org_latency_p50']:.3f}s p95={result['org_latency_p95']:.3f}s  peak_rss={result['peak_rss_mb']:.1f}MB  "
+        f"api={result['api_calls']}"
+    )
+    for line in result['stderr_tail']:
+        print(f'    {line}')
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end benchmark of main.py against fake scanners and a stub GitHub API')
+    parser.add_argument('scenarios', nargs='*', help=f'Scenarios to run (default: all). Available: {", ".join(SCENARIOS)}')
+    parser.add_argument('--quick', action='store_true', help=f'Only run {", ".join(QUICK)}')
+    parser.add_argument('-j', metavar='N', type=int, default=1, dest='jobs', help='Organizations scanned in parallel by main.py (default: 1)')
+    parser.add_argument('--rate', type=float, default=0, help='Findings per second emitted by each fake scanner (default: unlimited)')
+    parser.add_argument('--startup', type=float, default=0, help='Seconds each fake scanner sleeps before producing output')
+    parser.add_argument('--repos', type=int, default=5, help='Repositories reported per organization by the stub API')
+    parser.add_argument('--api-latency', type=float, default=0, dest='api_latency', help='Seconds added to every stub API response')
+    parser.add_argument('--json', metavar='FILE', dest='json_output', help='Write results to FILE as JSON')
+    parser.add_argument('--keep', action='store_true', help='Keep per-scenario working directories')
+    args, extra_args = parser.parse_known_args()
+
+    names = args.scenarios or (QUICK if args.quick else list(SCENARIOS))
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenario(s): {", ".join(unknown)}')
+
+    results = []
+    for name in names:
+        print(f'[*] Running {name}...')
+        result = run_scenario(
+            name, SCENARIOS[name]['orgs'], SCENARIOS[name]['findings'], args.jobs, extra_args,
+            args.rate, args.startup, args.repos, args.api_latency, args.keep
+        )
+        print_row(result)
+        results.append(result)
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'[✓] Results written to {args.json_output}')
+    return 0 if all(result['exit_code'] == 0 for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils import log_error
+
+
+class APICache:
+    def __init__(self, path='ghoss/cache.db', max_entries=10000, refresh=False):
+        self.path = path
+        self.max_entries = max_entries
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS api_cache ('
+            'key TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, '
+            'expires_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS api_cache_last_used ON api_cache (last_used)')
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute('SELECT body, etag, expires_at FROM api_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE api_cache SET last_used = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+        body, etag, expires_at = row
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError:
+            return None
+        return {'data': data, 'etag': etag, 'fresh': not self.refresh and expires_at > time.time()}
+
+    def set(self, key, data, etag=None, ttl=86400):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO api_cache (key, body, etag, expires_at, last_used) VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(data, ensure_ascii=False), etag, now + ttl, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def renew(self, key, ttl=86400):
+        now = time.time()
+        with self.lock:
+            self.conn.execute('UPDATE api_cache SET expires_at = ?, last_used = ? WHERE key = ?', (now + ttl, now, key))
+            self.conn.commit()
+
+    def _evict(self):
+        count = self.conn.execute('SELECT COUNT(*) FROM api_cache').fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                'DELETE FROM api_cache WHERE key IN (SELECT key FROM api_cache ORDER BY last_used ASC LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error as e:
+                log_error(f'Error closing API cache: {str(e)}')
@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from dedup import normalize_finding
+from journal import SECRET_KEYS
+from utils import log_error
+
+
+def compact_extension():
+    return '.jsonl.zst' if zstandard else '.jsonl.gz'
+
+def open_compact(path, mode='rt'):
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f'The zstandard package is required to open {path}')
+        return zstandard.open(path, mode, encoding='utf-8')
+    return gzip.open(path, mode, encoding='utf-8')
+
+def finding_record(org_index, tool, secret):
+    normalized = normalize_finding(tool, secret)
+    if tool == 'trufflehog':
+        detector = secret.get('DetectorName') or ''
+        verified = bool(secret.get('Verified'))
+    else:
+        rule = secret.get('rule') or {}
+        detector = rule.get('name') or rule.get('id') or ''
+        verified = ((secret.get('finding') or {}).get('validation') or {}).get('status') == 'Active Credential'
+    return {
+        'type': 'finding',
+        'org': org_index,
+        'tool': tool,
+        'detector': detector,
+        'verified': verified,
+        'repository': normalized['repository'],
+        'finding': secret
+    }
+
+def write_compact_results(journal, scan_info, path, transform=None):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open_compact(path, 'wt') as f:
+            f.write(json.dumps(dict(scan_info, type='scan_info'), ensure_ascii=False) + '\n')
+            for org_index, (index, result) in enumerate(journal.iter_results()):
+                f.write(json.dumps(dict(result, type='organization', org=org_index), ensure_ascii=False) + '\n')
+                for _, tool in SECRET_KEYS:
+                    for secret in journal.iter_findings(index, tool, transform):
+                        f.write(json.dumps(finding_record(org_index, tool, secret), ensure_ascii=False) + '\n')
+        return True
+    except Exception as e:
+        log_error(f'Error saving compact results: {str(e)}')
+        print(f'[!] Failed to save compact results')
+        return False
+
+def iter_compact(path):
+    with open_compact(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
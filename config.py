@@ -2,7 +2,8 @@ import os
 
 CONFIG = {
     'TH_GITHUB_TOKEN': os.getenv('TH_GITHUB_TOKEN', ''),
-    'KF_GITHUB_TOKEN': os.getenv('KF_GITHUB_TOKEN', '')
+    'KF_GITHUB_TOKEN': os.getenv('KF_GITHUB_TOKEN', ''),
+    'GITHUB_API_URL': os.getenv('GITHUB_API_URL', 'https://api.github.com')
 }
 
 class Colors:
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from utils import log_error
+
+
+def _detector_family(name):
+    name = (name or '').lower()
+    if name.startswith('kingfisher.'):
+        name = name.split('.')[1]
+    return re.sub(r'[^a-z0-9]', '', name)
+
+def normalize_finding(tool, finding):
+    if tool == 'trufflehog':
+        data = finding.get('SourceMetadata', {}).get('Data') or {}
+        source = data.get('Github') or data.get('Git') or {}
+        return {
+            'detector': _detector_family(finding.get('DetectorName')),
+            'secret': finding.get('Raw') or finding.get('RawV2') or '',
+            'repository': source.get('repository', ''),
+            'file': source.get('file', ''),
+            'line': source.get('line'),
+            'commit': source.get('commit', '')
+        }
+    rule = finding.get('rule', {})
+    match = finding.get('finding', {})
+    git_metadata = match.get('git_metadata') or {}
+    commit = git_metadata.get('commit') or {}
+    return {
+        'detector': _detector_family(rule.get('id') or rule.get('name')),
+        'secret': match.get('snippet', ''),
+        'repository': git_metadata.get('repository_url', ''),
+        'file': match.get('path', ''),
+        'line': match.get('line'),
+        'commit': commit.get('id', '') if isinstance(commit, dict) else str(commit)
+    }
+
+def _digest(*parts):
+    return hashlib.blake2b('\x00'.join(str(part) for part in parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class DedupIndex:
+    MAX_LOCATIONS = 20
+
+    def __init__(self, path='ghoss/dedup_index.json'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.secrets = {}
+        self.seen_this_run = set()
+        self.run_timestamp = datetime.now().isoformat()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.secrets = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                log_error(f'Error loading dedup index {path}: {str(e)}')
+
+    def fingerprint(self, tool, finding):
+        normalized = normalize_finding(tool, finding)
+        secret_id = _digest(normalized['secret'])
+        occurrence_id = _digest(normalized['detector'], normalized['secret'], normalized['repository'], normalized['file'], normalized['line'])
+        return secret_id, occurrence_id, normalized
+
+    def _location(self, occurrence_id, org, tool, normalized):
+        return {
+            'occurrence': occurrence_id,
+            'organization': org,
+            'tool': tool,
+            'repository': normalized['repository'],
+            'file': normalized['file'],
+            'line': normalized['line'],
+            'commit': normalized['commit']
+        }
+
+    def _observe(self, org, tool, finding):
+        secret_id, occurrence_id, normalized = self.fingerprint(tool, finding)
+        if not normalized['secret']:
+            return True
+        location = self._location(occurrence_id, org, tool, normalized)
+        record = self.secrets.get(secret_id)
+        if record is None:
+            self.secrets[secret_id] = {
+                'detector': normalized['detector'],
+                'first_seen': dict(location, timestamp=self.run_timestamp),
+                'also_seen_in': []
+            }
+        else:
+            known = [record['first_seen']['occurrence']] + [seen['occurrence'] for seen in record['also_seen_in']]
+            if occurrence_id not in known and len(record['also_seen_in']) < self.MAX_LOCATIONS:
+                record['also_seen_in'].append(location)
+        if secret_id in self.seen_this_run:
+            return False
+        self.seen_this_run.add(secret_id)
+        return True
+
+    def unique(self, org, tool, secrets, org_result):
+        for secret in secrets:
+            finding = json.loads(secret) if isinstance(secret, str) else secret
+            with self.lock:
+                observed = self._observe(org, tool, finding)
+            if observed:
+                yield secret
+            else:
+                org_result['duplicate_secrets_suppressed'] += 1
+
+    def mark_seen(self, tool, secret):
+        with self.lock:
+            self.seen_this_run.add(self.fingerprint(tool, secret)[0])
+
+    def annotate(self, tool, secret):
+        secret_id = self.fingerprint(tool, secret)[0]
+        record = self.secrets.get(secret_id)
+        if record:
+            secret['ghoss_dedup'] = {
+                'fingerprint': secret_id,
+                'first_seen': record['first_seen'],
+                'also_seen_in': record['also_seen_in']
+            }
+        return secret
+
+    def save(self):
+        temp_path = f'{self.path}.tmp'
+        try:
+            with self.lock:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.secrets, f, separators=(',', ':'), ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log_error(f'Error saving dedup index {self.path}: {str(e)}')
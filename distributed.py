@@ -0,0 +1,137 @@
+import glob
+import os
+import socket
+import sqlite3
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from journal import SECRET_KEYS, ResultJournal
+from metrics import ScanMetrics
+from pipeline import empty_result, record_result, resolve_organization, scan_and_record
+from utils import log_error
+
+STATUS_RANK = {'failed': 0, 'skipped': 1, 'successful': 2}
+
+
+def worker_id():
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+class LeaseKeeper:
+    def __init__(self, queue, run_id, worker):
+        self.queue = queue
+        self.run_id = run_id
+        self.worker = worker
+        self.held = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._renew, name='ghoss-lease', daemon=True)
+        self.thread.start()
+
+    def add(self, index):
+        with self.lock:
+            self.held.add(index)
+
+    def remove(self, index):
+        with self.lock:
+            self.held.discard(index)
+
+    def _renew(self):
+        while not self.stopped.wait(self.queue.lease_seconds / 3):
+            with self.lock:
+                indexes = list(self.held)
+            try:
+                self.queue.renew(self.run_id, indexes, self.worker)
+            except sqlite3.Error as e:
+                log_error(f'Error renewing leases for {self.worker}: {str(e)}')
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_worker(context, queue, run_id, worker, jobs, allocate_outputs, org_mapping=None, resolved=None, poll_interval=10):
+    total = queue.run(run_id)['total']
+    keeper = LeaseKeeper(queue, run_id, worker)
+    processed = 0
+
+    def process(index, organization, temp_th_output, temp_kf_output):
+        try:
+            print(f'[#] [{index + 1}/{total}] Processing {organization}')
+            org_metrics = ScanMetrics(organization)
+            with metrics.bind(org_metrics):
+                selected_org, outcome = resolve_organization(context.scanner, organization, False, org_mapping, resolved)
+            if selected_org:
+                org_metrics.organization = selected_org
+                recorded = scan_and_record(context, index, selected_org, organization, temp_th_output, temp_kf_output, f'{selected_org}: ', org_metrics)
+            else:
+                record_result(context, index, organization, *outcome, org_metrics)
+                recorded = True
+            if recorded:
+                queue.complete(run_id, index, worker)
+            else:
+                queue.release(run_id, index, worker)
+        finally:
+            keeper.remove(index)
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='ghoss-worker') as executor:
+            running = set()
+            while True:
+                while len(running) < jobs:
+                    job = queue.claim(run_id, worker)
+                    if not job:
+                        break
+                    keeper.add(job[0])
+                    running.add(executor.submit(process, *job, *allocate_outputs()))
+                if not running:
+                    active = queue.counts(run_id)['active']
+                    if not active:
+                        break
+                    print(f'[ℹ] Waiting for {active} organization(s) leased by other workers')
+                    keeper.stopped.wait(poll_interval)
+                    continue
+                done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        future.result()
+                        processed += 1
+                    except Exception as e:
+                        log_error(f'Worker {worker} failed processing a job of run {run_id}: {str(e)}')
+    finally:
+        keeper.close()
+    return processed
+
+def merge_run(queue, run_id, journal, metrics_filename):
+    results_dir = queue.results_dir(run_id)
+    best = {}
+    worker_journals = []
+    for path in sorted(glob.glob(os.path.join(results_dir, 'journal_*.jsonl'))):
+        worker_journal = ResultJournal(path)
+        worker_journals.append(worker_journal)
+        for index, entry in worker_journal.entries.items():
+            current = best.get(index)
+            if current is None or STATUS_RANK.get(entry['status'], 0) > STATUS_RANK.get(current[1]['status'], 0):
+                best[index] = (worker_journal, entry)
+    try:
+        for index, organization in enumerate(queue.organizations(run_id)):
+            if index in best:
+                worker_journal = best[index][0]
+                record = worker_journal.read(index)
+                result = record['result']
+                for key, tool in SECRET_KEYS:
+                    result[key] = worker_journal.iter_findings(index, tool)
+                journal.append(index, organization, result, record['status'])
+            else:
+                journal.append(index, organization, empty_result(organization, 'not_scanned'), 'failed')
+    finally:
+        for worker_journal in worker_journals:
+            worker_journal.close()
+    with open(metrics_filename, 'w', encoding='utf-8') as out:
+        for path in sorted(glob.glob(os.path.join(results_dir, 'metrics_*.jsonl'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.endswith('\n'):
+                        out.write(line)
+    return len(best), len(worker_journals)
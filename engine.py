@@ -0,0 +1,198 @@
+import asyncio
+import signal
+import subprocess
+from collections import deque
+
+import metrics
+from metrics import ScanMetrics
+from pipeline import (finish_scan, plan_scan, record_result,
+                      resolve_organization, scan_time_limit)
+from scanner import advance_steps
+
+
+class AsyncScanEngine:
+    STREAM_LIMIT = 64 * 1024 * 1024
+
+    def __init__(self, context, jobs=1, search_slots=1, core_slots=8, trufflehog_slots=None, kingfisher_slots=None):
+        self.context = context
+        self.scanner = context.scanner
+        self.jobs = asyncio.Semaphore(jobs)
+        scanner_slots = jobs * max(context.shards, 1)
+        self.semaphores = {
+            'search': asyncio.Semaphore(search_slots),
+            'core': asyncio.Semaphore(core_slots),
+            'trufflehog': asyncio.Semaphore(trufflehog_slots or scanner_slots),
+            'kingfisher': asyncio.Semaphore(kingfisher_slots or scanner_slots)
+        }
+        self.processes = set()
+
+    async def _call(self, resource, fn, *args):
+        async with self.semaphores[resource]:
+            return await asyncio.to_thread(fn, *args)
+
+    async def _stream_command(self, slot, cmd, on_line, env=None):
+        async with self.semaphores[slot]:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, limit=self.STREAM_LIMIT
+            )
+            self.processes.add(process)
+            stderr_tail = deque(maxlen=50)
+            bytes_read = 0
+
+            async def drain_stderr():
+                async for line in process.stderr:
+                    stderr_tail.append(line.decode('utf-8', 'replace'))
+
+            async def pump_stdout():
+                nonlocal bytes_read
+                async for line in process.stdout:
+                    bytes_read += len(line)
+                    on_line(line.decode('utf-8', 'replace'))
+                return await process.wait()
+
+            stderr_task = asyncio.create_task(drain_stderr())
+            timeout = self.scanner.scan_timeout()
+            try:
+                returncode = await asyncio.wait_for(pump_stdout(), timeout)
+            except asyncio.TimeoutError:
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await asyncio.shield(process.wait())
+                self.processes.discard(process)
+                await asyncio.gather(stderr_task, return_exceptions=True)
+                scan_metrics = metrics.current()
+                if scan_metrics:
+                    scan_metrics.record_output(slot, bytes_parsed=bytes_read)
+            return returncode, ''.join(stderr_tail)
+
+    def kill_processes(self):
+        for process in list(self.processes):
+            if process.returncode is None:
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+
+    async def _run_steps(self, slot, steps):
+        value = error = None
+        with metrics.phase(slot):
+            while True:
+                done, step = await asyncio.to_thread(advance_steps, steps, value, error)
+                if done:
+                    return step
+                value = error = None
+                try:
+                    value = await self._stream_command(slot, *step)
+                except Exception as e:
+                    error = e
+
+    async def _run_scanners(self, org, th_output_file, kf_output_file, repos=None, local_repos=None):
+        failed_repos = []
+        th_steps = self.scanner.trufflehog_steps(org, th_output_file, repos=repos, local_repos=local_repos, failed_repos=failed_repos)
+        kf_steps = self.scanner.kingfisher_steps(org, kf_output_file, repos=repos, local_repos=local_repos)
+        if self.context.concurrent:
+            (th_success, th_secrets), (kf_success, kf_secrets) = await asyncio.gather(
+                self._run_steps('trufflehog', th_steps), self._run_steps('kingfisher', kf_steps)
+            )
+        else:
+            th_success, th_secrets = await self._run_steps('trufflehog', th_steps)
+            kf_success, kf_secrets = await self._run_steps('kingfisher', kf_steps)
+        return th_success, th_secrets, kf_success, kf_secrets, failed_repos
+
+    async def run_scanners(self, org, th_output_file, kf_output_file, repos=None):
+        mirror_cache = self.scanner.mirror_cache
+        if repos is None or not mirror_cache:
+            return await self._run_scanners(org, th_output_file, kf_output_file, repos=repos)
+        groups = []
+        results = []
+        unmirrored = []
+        for batch, batch_th_output, batch_kf_output in self.scanner.mirror_batches(repos, th_output_file, kf_output_file):
+            checkout = mirror_cache.checkout(batch)
+            mirrors = await asyncio.to_thread(checkout.__enter__)
+            try:
+                local_repos, failed = self.scanner.split_mirrored(batch, mirrors)
+                if local_repos:
+                    groups.append([repo for repo, _ in local_repos])
+                    results.append(await self._run_scanners(org, batch_th_output, batch_kf_output, local_repos=local_repos))
+            finally:
+                await asyncio.to_thread(checkout.__exit__, None, None, None)
+            unmirrored.extend(failed)
+        if unmirrored:
+            print(f'[!] Failed mirroring {len(unmirrored)} repositories, scanning them remotely')
+            groups.append(unmirrored)
+            results.append(await self._run_scanners(
+                org, self.scanner.shard_output_file(th_output_file, 'remote'),
+                self.scanner.shard_output_file(kf_output_file, 'remote'), repos=unmirrored
+            ))
+        return self.scanner.combine_outcomes(org, groups, results, 'mirror batch')
+
+    async def run_sharded(self, org, th_output_file, kf_output_file, repos, shard_count):
+        shards = self.scanner.shard_repos(repos, shard_count)
+        results = await asyncio.gather(*(
+            self.run_scanners(
+                org, self.scanner.shard_output_file(th_output_file, index),
+                self.scanner.shard_output_file(kf_output_file, index), shard
+            )
+            for index, shard in enumerate(shards)
+        ), return_exceptions=True)
+        return self.scanner.combine_outcomes(org, shards, results)
+
+    async def scan_organization(self, index, total, organization, temp_th_output, temp_kf_output, interactive, org_mapping, resolved):
+        context = self.context
+        async with self.jobs:
+            print(f'[#] [{index + 1}/{total}] Processing {organization}')
+            org_metrics = ScanMetrics(organization)
+            with metrics.bind(org_metrics):
+                selected_org, outcome = await self._call('search', resolve_organization, self.scanner, organization, interactive, org_mapping, resolved)
+                if not selected_org:
+                    await asyncio.to_thread(record_result, context, index, organization, *outcome, org_metrics)
+                    return
+                org_metrics.organization = selected_org
+                label = f'{selected_org}: '
+                all_repos, repos, skipped = await self._call('core', plan_scan, context, selected_org, label)
+                if skipped:
+                    org_result, status = skipped
+                else:
+                    with org_metrics.phase('scan'), self.scanner.time_limit(scan_time_limit(context, organization)):
+                        if context.shards > 1 and all_repos:
+                            scan_outcome = await self.run_sharded(
+                                selected_org, temp_th_output, temp_kf_output,
+                                repos if repos is not None else all_repos, context.shards
+                            )
+                        else:
+                            scan_outcome = await self.run_scanners(selected_org, temp_th_output, temp_kf_output, repos)
+                    org_result, status = await asyncio.to_thread(
+                        finish_scan, context, selected_org, organization, all_repos, repos, scan_outcome
+                    )
+            await asyncio.to_thread(record_result, context, index, organization, org_result, status, org_metrics, label)
+
+    async def run(self, work, total, interactive=False, org_mapping=None, resolved=None):
+        loop = asyncio.get_running_loop()
+        previous_handler = signal.getsignal(signal.SIGINT)
+        loop.add_signal_handler(signal.SIGINT, asyncio.current_task().cancel)
+        tasks = [
+            asyncio.create_task(self.scan_organization(index, total, organization, temp_th_output, temp_kf_output, interactive, org_mapping, resolved))
+            for index, organization, temp_th_output, temp_kf_output in work
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            self.kill_processes()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            loop.remove_signal_handler(signal.SIGINT)
+            signal.signal(signal.SIGINT, previous_handler)
+
+
+def run_async(context, work, total, jobs=1, interactive=False, org_mapping=None, resolved=None):
+    engine = AsyncScanEngine(context, jobs)
+    try:
+        asyncio.run(engine.run(work, total, interactive, org_mapping, resolved))
+    except asyncio.CancelledError:
+        return False
+    return True
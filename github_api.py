@@ -0,0 +1,152 @@
+import random
+import time
+from urllib.parse import urlencode
+
+import metrics
+from tokens import TokenPool
+from utils import log_error
+
+
+class GitHubAPIClient:
+    def __init__(self, token=None, base_url='https://api.github.com', pool_size=10, max_retries=4, request_timeout=30, reserve=1, cache=None, tokens=None):
+        self.tokens = tokens or TokenPool([token], reserve)
+        self.cache = cache
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self.reserve = reserve
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept': 'application/vnd.github.v3+json'})
+        self.request_error = requests.RequestException
+
+    @staticmethod
+    def resource_for(path):
+        if path.startswith('/search/'):
+            return 'search'
+        if path.startswith('/graphql'):
+            return 'graphql'
+        return 'core'
+
+    def _throttle(self, resource, token):
+        rate_limit = self.tokens.rate_limit(token, resource)
+        with rate_limit.lock:
+            if rate_limit.remaining is None:
+                return 0
+            wait = rate_limit.seconds_until_reset()
+            if wait <= 0:
+                rate_limit.remaining = None
+                return 0
+            if rate_limit.remaining <= self.reserve:
+                print(f'[!] Rate limit reached for {resource} API, waiting {int(wait) + 1} seconds...')
+                time.sleep(wait + 1)
+                rate_limit.remaining = None
+                return wait + 1
+            # Spread what is left of the window evenly once the quota runs low
+            delay = 0
+            if rate_limit.limit and rate_limit.remaining < rate_limit.limit * 0.1:
+                delay = wait / rate_limit.remaining
+                time.sleep(delay)
+            rate_limit.remaining -= 1
+            return delay
+
+    def _update_rate_limit(self, resource, token, response):
+        headers = response.headers
+        resource = headers.get('X-RateLimit-Resource', resource)
+        rate_limit = self.tokens.rate_limit(token, resource)
+        if rate_limit is None or 'X-RateLimit-Remaining' not in headers:
+            return
+        try:
+            with rate_limit.lock:
+                rate_limit.remaining = int(headers['X-RateLimit-Remaining'])
+                rate_limit.limit = int(headers.get('X-RateLimit-Limit', rate_limit.limit or 0)) or None
+                rate_limit.reset = int(headers.get('X-RateLimit-Reset', time.time()))
+        except ValueError:
+            pass
+
+    def _retry_delay(self, response, attempt):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return int(retry_after)
+            if response.headers.get('X-RateLimit-Remaining') == '0' and response.headers.get('X-RateLimit-Reset', '').isdigit():
+                return max(1, int(response.headers['X-RateLimit-Reset']) - int(time.time()) + 1)
+        return min(60, 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def _is_rate_limited(response):
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            'Retry-After' in response.headers or response.headers.get('X-RateLimit-Remaining') == '0'
+        )
+
+    def request(self, method, path, **kwargs):
+        resource = self.resource_for(path)
+        url = path if path.startswith('http') else f'{self.base_url}{path}'
+        kwargs.setdefault('timeout', self.request_timeout)
+        headers = kwargs.pop('headers', None) or {}
+        response = None
+        waited = 0
+        for attempt in range(self.max_retries + 1):
+            token = self.tokens.acquire(resource)
+            waited += self._throttle(resource, token)
+            scan_metrics = metrics.current()
+            try:
+                response = self.session.request(method, url, headers=dict(headers, Authorization=f'token {token}') if token else headers, **kwargs)
+            except self.request_error as e:
+                if scan_metrics:
+                    scan_metrics.record_api_call(waited)
+                if attempt == self.max_retries:
+                    raise
+                log_error(f'GitHub API request to {path} failed: {str(e)}')
+                time.sleep(self._retry_delay(None, attempt))
+                waited = 0
+                continue
+            if scan_metrics:
+                scan_metrics.record_api_call(waited)
+            waited = 0
+            self._update_rate_limit(resource, token, response)
+            if self._is_rate_limited(response):
+                delay = self._retry_delay(response, attempt)
+                self.tokens.suspend(token, resource, delay)
+                if self.tokens.available(resource):
+                    continue
+                print(f'[!] Rate limit hit, waiting {int(delay)} seconds...')
+                waited = delay
+            elif response.status_code >= 500:
+                delay = self._retry_delay(None, attempt)
+            else:
+                return response
+            if attempt < self.max_retries:
+                time.sleep(delay)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def get_json(self, path, params=None, ttl=86400):
+        key = f'{path}?{urlencode(sorted((params or {}).items()))}'
+        cached = self.cache.get(key) if self.cache else None
+        if cached and cached['fresh']:
+            return 200, cached['data']
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        response = self.get(path, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self.cache.renew(key, ttl)
+            return 200, cached['data']
+        if response.status_code != 200:
+            return response.status_code, None
+        data = response.json()
+        if self.cache:
+            self.cache.set(key, data, response.headers.get('ETag'), ttl)
+        return 200, data
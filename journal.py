@@ -0,0 +1,204 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+from utils import log_error
+
+SECRET_KEYS = (('trufflehog_secrets', 'trufflehog'), ('kingfisher_secrets', 'kingfisher'))
+
+
+class ResultJournal:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path):
+            self._load()
+        self.file = open(path, 'ab')
+
+    @staticmethod
+    def run_id_from_path(path):
+        match = re.match(r'journal_(\w+)\.jsonl$', os.path.basename(path))
+        return match.group(1) if match else None
+
+    def _load(self):
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if self._is_record(record):
+                    self._index(record, offset)
+                elif not self._is_finding(record):
+                    log_error(f'Ignoring corrupt journal entry at offset {offset} in {self.path}')
+                offset += len(line)
+                valid_size = offset
+        if valid_size < os.path.getsize(self.path):
+            log_error(f'Truncating incomplete journal entry at offset {valid_size} in {self.path}')
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+
+    @staticmethod
+    def _is_record(record):
+        return (
+            isinstance(record, dict) and isinstance(record.get('index'), int) and not isinstance(record['index'], bool)
+            and isinstance(record.get('input'), str) and isinstance(record.get('status'), str)
+            and isinstance(record.get('result'), dict)
+        )
+
+    @staticmethod
+    def _is_finding(record):
+        return isinstance(record, dict) and isinstance(record.get('tool'), str) and isinstance(record.get('secret'), dict)
+
+    def _index(self, record, offset):
+        result = record.get('result', {})
+        self.entries[record['index']] = {
+            'offset': offset,
+            'findings_offset': record.get('findings_offset'),
+            'input': record.get('input'),
+            'status': record.get('status'),
+            'trufflehog_secrets_count': result.get('trufflehog_secrets_count', 0),
+            'kingfisher_secrets_count': result.get('kingfisher_secrets_count', 0),
+            'duplicate_secrets_suppressed': result.get('duplicate_secrets_suppressed', 0)
+        }
+
+    def is_completed(self, index, organization):
+        entry = self.entries.get(index)
+        return bool(entry) and entry['input'] == organization and entry['status'] != 'failed'
+
+    @staticmethod
+    def _encode_finding(secret):
+        return secret.encode('utf-8') if isinstance(secret, str) else json.dumps(secret, ensure_ascii=False).encode('utf-8')
+
+    def append(self, index, organization, org_result, status, finalize=None):
+        with tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(self.path))) as spool:
+            for key, tool in SECRET_KEYS:
+                prefix = f'{{"index": {index}, "tool": "{tool}", "secret": '.encode('utf-8')
+                count = 0
+                for secret in org_result.pop(key, None) or []:
+                    spool.write(prefix + self._encode_finding(secret) + b'}\n')
+                    count += 1
+                org_result[f'{key}_count'] = count
+            if finalize:
+                finalize(org_result)
+            spool.seek(0)
+            with self.lock:
+                findings_offset = self.file.tell()
+                shutil.copyfileobj(spool, self.file)
+                record = {'index': index, 'input': organization, 'status': status, 'result': org_result, 'findings_offset': findings_offset}
+                offset = self.file.tell()
+                self.file.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self._index(record, offset)
+
+    def read(self, index):
+        with open(self.path, 'rb') as f:
+            f.seek(self.entries[index]['offset'])
+            return json.loads(f.readline())
+
+    def iter_findings(self, index, tool, transform=None):
+        entry = self.entries[index]
+        with open(self.path, 'rb') as f:
+            if entry['findings_offset'] is None:
+                f.seek(entry['offset'])
+                for secret in json.loads(f.readline())['result'].get(f'{tool}_secrets', []):
+                    yield transform(tool, secret) if transform else secret
+                return
+            f.seek(entry['findings_offset'])
+            while f.tell() < entry['offset']:
+                record = json.loads(f.readline())
+                if self._is_finding(record) and record['index'] == index and record['tool'] == tool:
+                    yield transform(tool, record['secret']) if transform else record['secret']
+
+    def iter_results(self):
+        with open(self.path, 'rb') as f:
+            for index in sorted(self.entries):
+                f.seek(self.entries[index]['offset'])
+                result = json.loads(f.readline())['result']
+                yield index, {key: value for key, value in result.items() if key not in dict(SECRET_KEYS)}
+
+    def summary(self):
+        counts = {'successful': 0, 'failed': 0, 'skipped': 0}
+        trufflehog_secrets = 0
+        kingfisher_secrets = 0
+        for entry in self.entries.values():
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+            trufflehog_secrets += entry['trufflehog_secrets_count']
+            kingfisher_secrets += entry['kingfisher_secrets_count']
+        return {
+            'successful_scans': counts['successful'],
+            'failed_scans': counts['failed'],
+            'skipped_scans': counts['skipped'],
+            'trufflehog_secrets_found': trufflehog_secrets,
+            'kingfisher_secrets_found': kingfisher_secrets
+        }
+
+    def duplicates_suppressed(self):
+        return sum(entry['duplicate_secrets_suppressed'] for entry in self.entries.values())
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def _indented_json(obj, level):
+    return json.dumps(obj, indent=2, ensure_ascii=False).replace('\n', '\n' + '  ' * level)
+
+def _write_json_array(f, items, level, write_item=None):
+    empty = True
+    for item in items:
+        f.write('[\n' if empty else ',\n')
+        f.write('  ' * (level + 1))
+        if write_item:
+            write_item(f, item, level + 1)
+        else:
+            f.write(_indented_json(item, level + 1))
+        empty = False
+    f.write('[]' if empty else '\n' + '  ' * level + ']')
+
+def _result_writer(journal, transform):
+    def write_result(f, entry, level):
+        index, result = entry
+        f.write('{')
+        separator = '\n'
+        for key, value in result.items():
+            f.write(f'{separator}{"  " * (level + 1)}{json.dumps(key, ensure_ascii=False)}: {_indented_json(value, level + 1)}')
+            separator = ',\n'
+            for secret_key, tool in SECRET_KEYS:
+                if key == f'{secret_key}_count':
+                    f.write(f'{separator}{"  " * (level + 1)}"{secret_key}": ')
+                    _write_json_array(f, journal.iter_findings(index, tool, transform), level + 1)
+        f.write('}' if separator == '\n' else '\n' + '  ' * level + '}')
+    return write_result
+
+def _iter_all_findings(journal, tool, transform):
+    for index in sorted(journal.entries):
+        yield from journal.iter_findings(index, tool, transform)
+
+def write_results_from_journal(journal, scan_info, th_output_filename, kf_output_filename, combined_output_filename, transform=None):
+    try:
+        for filename in (th_output_filename, kf_output_filename, combined_output_filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(th_output_filename, 'w', encoding='utf-8') as f:
+            _write_json_array(f, _iter_all_findings(journal, 'trufflehog', transform), 0)
+        with open(kf_output_filename, 'w', encoding='utf-8') as f:
+            _write_json_array(f, _iter_all_findings(journal, 'kingfisher', transform), 0)
+        with open(combined_output_filename, 'w', encoding='utf-8') as f:
+            f.write('{\n  "scan_info": ' + _indented_json(scan_info, 1) + ',\n  "results": ')
+            _write_json_array(f, journal.iter_results(), 1, _result_writer(journal, transform))
+            f.write('\n}')
+        return True
+    except Exception as e:
+        log_error(f'Error saving results: {str(e)}')
+        print(f'[!] Failed to save results')
+        return False
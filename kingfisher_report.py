@@ -0,0 +1,156 @@
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_loads = orjson.loads if orjson else json.loads
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_NON_WHITESPACE = re.compile(r'[^ \t\r\n]')
+
+
+def _is_match(value):
+    return isinstance(value, dict) and bool(value.get('rule')) and bool(value.get('finding'))
+
+def _matches_from(value):
+    if _is_match(value):
+        yield value
+    elif isinstance(value, dict) and isinstance(value.get('matches'), list):
+        for match in value['matches']:
+            if _is_match(match):
+                yield match
+    elif isinstance(value, list):
+        for item in value:
+            yield from _matches_from(item)
+
+
+class _StreamReader:
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(max(self.CHUNK_SIZE, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f'Expecting {char!r}', self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_object(reader):
+    reader.expect('{')
+    fields = {}
+    while True:
+        char = reader.peek()
+        if char == '}':
+            reader.pos += 1
+            break
+        if char == ',':
+            reader.pos += 1
+            continue
+        key = reader.value()
+        reader.expect(':')
+        if key == 'matches' and reader.peek() == '[':
+            yield from _iter_array(reader, _iter_values)
+        else:
+            fields[key] = reader.value()
+    yield from _matches_from(fields)
+
+def _iter_values(reader):
+    yield from _matches_from(reader.value())
+
+def _iter_groups(reader):
+    if reader.peek() == '{':
+        yield from _iter_object(reader)
+    else:
+        yield from _iter_values(reader)
+
+def _iter_array(reader, handle_item):
+    reader.expect('[')
+    while True:
+        char = reader.peek()
+        if char == ']':
+            reader.pos += 1
+            return
+        if char == ',':
+            reader.pos += 1
+        elif not char:
+            raise json.JSONDecodeError('Unterminated array', reader.buffer, reader.pos)
+        else:
+            yield from handle_item(reader)
+
+def _iter_document(f):
+    reader = _StreamReader(f)
+    char = reader.peek()
+    if char == '[':
+        yield from _iter_array(reader, _iter_groups)
+    elif char:
+        yield from _iter_groups(reader)
+
+def _first_char(f):
+    while True:
+        char = f.read(1)
+        if not char or char not in _WHITESPACE:
+            f.seek(0)
+            return char
+
+def iter_kingfisher_matches(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        first_char = _first_char(f)
+        if not first_char:
+            return
+        if first_char == '{':
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    first = _loads(line)
+                except ValueError:
+                    break
+                yield from _matches_from(first)
+                for line in f:
+                    if line.strip():
+                        yield from _matches_from(_loads(line))
+                return
+            f.seek(0)
+        yield from _iter_document(f)
@@ -6,37 +6,121 @@ import random
 import signal
 import string
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import metrics
+from cache import APICache
+from compact import compact_extension, write_compact_results
 from config import CONFIG, Colors
+from dedup import DedupIndex
+from github_api import GitHubAPIClient
+from journal import SECRET_KEYS, ResultJournal, write_results_from_journal
+from metrics import ScanMetrics, read_metrics_lines, write_prometheus
+from mirrors import MirrorCache
+from pipeline import (ScanContext, record_result, resolve_organization,
+                      scan_and_record)
+from preflight import Preflight
+from resolver import OrgResolver
+from schedule import POLICIES, CostScheduler, ScanHistory, scan_mode
 from scanner import GitHubScanner
-from ui import get_arrow_key_selection
-from utils import (cleanup_temp_files, log_error, save_results_to_files,
+from state import ScanState
+from tokens import TokenPool
+from utils import (cleanup_temp_files, load_org_mapping, log_error,
                    signal_handler)
+from workqueue import WorkQueue
 
 
+def allocate_temp_outputs(used_random_strings, temp_files):
+    while True:
+        random_string = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+        if random_string not in used_random_strings:
+            used_random_strings.add(random_string)
+            break
+    temp_th_output = f'ghoss/temp/temp_trufflehog_{random_string}.json'
+    temp_kf_output = f'ghoss/temp/temp_kingfisher_{random_string}.json'
+    temp_files.extend([temp_th_output, temp_kf_output])
+    return temp_th_output, temp_kf_output
+
 def main():
     signal.signal(signal.SIGINT, lambda sig, frame: signal_handler(sig, frame, []))
 
-    ghoss_dir = os.path.join(os.getcwd(), 'ghoss')
-    os.makedirs(ghoss_dir, exist_ok=True)
-
     parser = argparse.ArgumentParser(description='GitHub organization secret scanner', add_help=False)
     parser.add_argument('-oL', metavar='FILE', dest='orglist', help='Path to file containing organization names')
     parser.add_argument('-o', metavar='ORGANIZATION', dest='org', help='Single organization name to scan')
     parser.add_argument('-t', metavar='SECONDS', type=int, dest='timeout', help='Timeout in seconds for scanning operations')
+    parser.add_argument('-c', action='store_true', dest='concurrent', help='Run TruffleHog and Kingfisher concurrently for each organization')
+    parser.add_argument('-j', metavar='N', type=int, default=1, dest='jobs', help='Number of organizations to scan in parallel (default: 1)')
+    parser.add_argument('-y', action='store_true', dest='batch', help='Resolve organizations without prompting unless the match is ambiguous')
+    parser.add_argument('-m', metavar='FILE', dest='mapping', help='Path to file mapping organization names to logins (name=login per line)')
+    parser.add_argument('--no-cache', action='store_true', dest='no_cache', help='Do not read or write the local GitHub API cache')
+    parser.add_argument('--refresh', action='store_true', help='Revalidate every cached GitHub API response')
+    parser.add_argument('--resume', metavar='JOURNAL', help='Resume a previous run from its journal, skipping completed organizations')
+    parser.add_argument('--dedup', action='store_true', help='Drop duplicate secrets across scanners and organizations and record where they were seen')
+    parser.add_argument('--incremental', action='store_true', help='Only scan repositories pushed to since the last successful scan')
+    parser.add_argument('--shards', metavar='N', type=int, default=1, help='Split each organization into N size-balanced repository shards scanned in parallel')
+    parser.add_argument('--mirror-cache', action='store_true', dest='mirror_cache', help='Scan local bare mirrors kept under ghoss/mirrors instead of cloning per scanner')
+    parser.add_argument('--mirror-cache-size', metavar='GB', type=float, default=50, dest='mirror_cache_size', help='Maximum size of the mirror cache in gigabytes (default: 50)')
+    parser.add_argument('--output-format', metavar='FORMAT', dest='output_format', choices=('json', 'compact', 'both'), default='json', help='Write pretty JSON result files, a compressed JSONL file with each finding stored once (queried with query.py), or both (default: json)')
+    parser.add_argument('--order', metavar='POLICY', choices=POLICIES, help=f'Schedule organizations by estimated scan cost ({", ".join(POLICIES)}) and, when -t is given, limit each organization to three times its estimate, capped by -t')
+    parser.add_argument('--tokens', metavar='FILE', dest='tokens_file', help='Path to file with additional GitHub tokens (one per line) rotated across API calls and scanner runs')
+    parser.add_argument('--async', action='store_true', dest='use_async', help='Run API lookups and scanner processes on an asyncio event loop instead of thread pools')
+    parser.add_argument('--no-update', action='store_true', dest='no_update', help='Do not run the daily Kingfisher self-update before scanning')
+    parser.add_argument('--enqueue', metavar='DIR', help='Add the organizations to a shared work queue in DIR for --worker processes and exit')
+    parser.add_argument('--worker', metavar='DIR', help='Claim and scan organizations from the shared work queue in DIR until it is drained')
+    parser.add_argument('--merge', metavar='DIR', help='Merge the per-worker results of a finished queued run in DIR into the usual result files')
+    parser.add_argument('--run', metavar='ID', dest='run_id', help='Queued run to work on or merge (default for --worker: oldest run with unfinished organizations)')
+    parser.add_argument('--lease', metavar='SECONDS', type=int, default=WorkQueue.LEASE_SECONDS, help=f'Seconds a worker holds an organization before another worker may take it over (default: {WorkQueue.LEASE_SECONDS})')
     parser.add_argument('-h', action='help', help='Show this help message and exit')
     args = parser.parse_args()
-    if not args.orglist and not args.org:
+    queue_dir = args.worker or args.merge
+    if sum(1 for mode in (args.enqueue, args.worker, args.merge) if mode) > 1:
+        print(f'[!] Only one of --enqueue, --worker and --merge can be used')
+        sys.exit(1)
+    if queue_dir and (args.orglist or args.org):
+        print(f'[!] Cannot use -oL or -o with --worker or --merge, organizations come from the queue')
+        sys.exit(1)
+    if not queue_dir and not args.orglist and not args.org:
         print(f'[!] Either -oL or -o must be provided')
         sys.exit(1)
+    if queue_dir and args.resume:
+        print(f'[!] Cannot use --resume with --worker or --merge')
+        sys.exit(1)
+    if args.worker and args.use_async:
+        print(f'[!] Cannot use --async with --worker')
+        sys.exit(1)
+    if args.merge and not args.run_id:
+        print(f'[!] --merge requires --run')
+        sys.exit(1)
+    if args.lease < 30:
+        print(f'[!] --lease must be at least 30 seconds')
+        sys.exit(1)
+    ghoss_dir = os.path.join(os.getcwd(), 'ghoss')
+    os.makedirs(ghoss_dir, exist_ok=True)
     if args.orglist and args.org:
         print(f'[!] Cannot use both -oL and -o together')
         sys.exit(1)
-    scanner = GitHubScanner(CONFIG['TH_GITHUB_TOKEN'], CONFIG['KF_GITHUB_TOKEN'], args.timeout)
-    temp_files = []
-    signal.signal(signal.SIGINT, lambda sig, frame: signal_handler(sig, frame, temp_files))
-    if args.org:
+    if args.jobs < 1:
+        print(f'[!] -j must be at least 1')
+        sys.exit(1)
+    if args.shards < 1:
+        print(f'[!] --shards must be at least 1')
+        sys.exit(1)
+    queue = None
+    run_id = None
+    if queue_dir:
+        queue = WorkQueue(queue_dir, args.lease)
+        run = queue.run(args.run_id)
+        if not run:
+            print(f'[!] Run {args.run_id} not found in {queue_dir}' if args.run_id else f'[!] No queued run with unfinished organizations in {queue_dir}')
+            sys.exit(1)
+        run_id = run['run_id']
+        organizations = queue.organizations(run_id)
+        unfinished = sum(queue.counts(run_id).get(status, 0) for status in ('pending', 'leased'))
+        if args.merge and unfinished:
+            print(f'[!] Run {run_id} still has {unfinished} unfinished organization(s)')
+            sys.exit(1)
+    elif args.org:
         organizations = [args.org]
     else:
         try:
@@ -46,162 +130,242 @@ def main():
             log_error(f'Organization file {args.orglist} not found')
             print(f'[!] Failed loading organizations from file')
             sys.exit(1)
+    if args.enqueue:
+        queue = WorkQueue(args.enqueue, args.lease)
+        run_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+        queue.enqueue(run_id, organizations, args.orglist or args.org)
+        queue.close()
+        print(f'[✓] Queued {len(organizations)} organization(s) as run {run_id} in {args.enqueue}')
+        return
+    api_cache = None if args.no_cache else APICache(os.path.join(ghoss_dir, 'cache.db'), refresh=args.refresh)
+    th_tokens = TokenPool.load(CONFIG['TH_GITHUB_TOKEN'], args.tokens_file)
+    kf_tokens = TokenPool.load(CONFIG['KF_GITHUB_TOKEN'], args.tokens_file)
+    if th_tokens is None or kf_tokens is None:
+        print(f'[!] Failed loading GitHub tokens from file')
+        sys.exit(1)
+    api_client = GitHubAPIClient(base_url=CONFIG['GITHUB_API_URL'], cache=api_cache, tokens=th_tokens)
+    mirror_cache = MirrorCache(os.path.join(ghoss_dir, 'mirrors'), int(args.mirror_cache_size * 1024 ** 3)) if args.mirror_cache else None
+    scanner = GitHubScanner(
+        th_tokens.tokens[0], kf_tokens.tokens[0], args.timeout, api_client=api_client,
+        mirror_cache=mirror_cache, th_tokens=th_tokens, kf_tokens=kf_tokens
+    )
+    temp_files = []
+    executors = []
+    signal.signal(signal.SIGINT, lambda sig, frame: signal_handler(sig, frame, temp_files, scanner, executors))
+    org_mapping = {}
+    if args.mapping:
+        org_mapping = load_org_mapping(args.mapping)
+        if org_mapping is None:
+            print(f'[!] Failed loading organization mapping from file')
+            sys.exit(1)
+    interactive = not args.batch and not args.worker and sys.stdin.isatty()
+    pipelined = args.jobs > 1 or not interactive
     used_random_strings = set()
     total_organizations = len(organizations)
-    successful_scans = 0
-    failed_scans = 0
-    skipped_scans = 0
-    all_results = {
-        'scan_info': {
-            'timestamp': datetime.now().isoformat(),
-            'total_organizations': total_organizations,
-            'organizations_file': args.orglist if args.orglist else args.org,
-            'successful_scans': 0,
-            'failed_scans': 0,
-            'skipped_scans': 0,
-            'trufflehog_secrets_found': 0,
-            'kingfisher_secrets_found': 0
-        },
-        'results': []
+    scan_info = {
+        'timestamp': datetime.now().isoformat(),
+        'total_organizations': total_organizations,
+        'organizations_file': run['source'] if queue else args.orglist if args.orglist else args.org,
+        'successful_scans': 0,
+        'failed_scans': 0,
+        'skipped_scans': 0,
+        'trufflehog_secrets_found': 0,
+        'kingfisher_secrets_found': 0
     }
-    while True:
+    global_random_string = run_id or (ResultJournal.run_id_from_path(args.resume) if args.resume else None)
+    while not global_random_string:
         global_random_string = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-        if global_random_string not in used_random_strings:
-            used_random_strings.add(global_random_string)
-            break
+    used_random_strings.add(global_random_string)
+    journal_filename = args.resume or f'ghoss/output/journal_{global_random_string}.jsonl'
+    metrics_filename = f'ghoss/output/metrics_{global_random_string}.jsonl'
+    if args.worker:
+        from distributed import run_worker, worker_id
+        worker = worker_id()
+        journal_filename = os.path.join(queue.results_dir(run_id), f'journal_{worker}.jsonl')
+        metrics_filename = os.path.join(queue.results_dir(run_id), f'metrics_{worker}.jsonl')
+    elif args.merge and os.path.exists(journal_filename):
+        os.remove(journal_filename)
+    if args.resume and not os.path.exists(args.resume):
+        print(f'[!] Journal {args.resume} not found')
+        sys.exit(1)
+    prometheus_filename = f'ghoss/output/metrics_{global_random_string}.prom'
     th_output_filename = f'ghoss/output/trufflehog_{global_random_string}.json'
     kf_output_filename = f'ghoss/output/kingfisher_{global_random_string}.json'
     combined_output_filename = f'ghoss/output/scan_results_{global_random_string}.json'
-    all_th_secrets = []
-    all_kf_secrets = []
+    compact_output_filename = f'ghoss/output/scan_results_{global_random_string}{compact_extension()}'
+    journal = ResultJournal(journal_filename)
+    dedup_index = DedupIndex(os.path.join(ghoss_dir, 'dedup_index.json')) if args.dedup else None
+    scan_state = ScanState(os.path.join(ghoss_dir, 'state.db')) if args.incremental else None
+    if dedup_index and journal.entries:
+        for index in journal.entries:
+            for _, tool in SECRET_KEYS:
+                for secret in journal.iter_findings(index, tool):
+                    dedup_index.mark_seen(tool, secret)
+    scan_history = ScanHistory(
+        os.path.join(ghoss_dir, 'scan_history.json'),
+        scan_mode(args.incremental, args.shards, args.mirror_cache, args.concurrent)
+    )
+    context = ScanContext(scanner, journal, args.concurrent, dedup_index, scan_state, args.shards, metrics_filename, scan_history)
     print()
     print(f'[ℹ] Loaded {total_organizations} organization(s)')
-    if CONFIG['TH_GITHUB_TOKEN']:
+    if len(th_tokens) > 1:
+        print(f'[✓] {len(th_tokens)} TruffleHog GitHub tokens supplied')
+    elif th_tokens:
         print(f'[✓] TruffleHog GitHub token supplied')
     else:
         print(f'[!] No TruffleHog GitHub token supplied')
-    if CONFIG['KF_GITHUB_TOKEN']:
+    if len(kf_tokens) > 1:
+        print(f'[✓] {len(kf_tokens)} Kingfisher GitHub tokens supplied')
+    elif kf_tokens:
         print(f'[✓] Kingfisher GitHub token supplied')
     else:
         print(f'[!] No Kingfisher GitHub token supplied')
+    if not args.merge:
+        preflight = Preflight(os.path.join(ghoss_dir, 'preflight.json'))
+        if not args.no_update and preflight.update_kingfisher():
+            print(f'[✓] Kingfisher self-update check completed')
+        for name, version in preflight.versions().items():
+            if version:
+                print(f'[✓] {name} found: {version}')
+            else:
+                print(f'[!] {name} not found in PATH')
+        preflight.save()
     print()
+    if journal.entries:
+        print(f'[ℹ] Resuming from {journal_filename}')
+        print()
+    resolved = {}
+    org_stats = {}
+    if not interactive and not args.merge:
+        pending_names = [
+            organization for i, organization in enumerate(organizations)
+            if organization not in org_mapping and not journal.is_completed(i, organization)
+        ]
+        if pending_names:
+            with metrics.bind(context.run_metrics):
+                org_stats = OrgResolver(api_client).resolve(pending_names)
+            scanner.org_stats.update((stats['login'].lower(), stats) for stats in org_stats.values())
+            resolved = {name: stats['login'] for name, stats in org_stats.items()}
+            print(f'[ℹ] Resolved {len(resolved)} of {len(pending_names)} organization(s) by exact login')
+            print()
+    schedule = list(enumerate(organizations))
+    if args.order:
+        context.scheduler = CostScheduler(scan_history, args.order, org_stats, args.timeout)
+        schedule = context.scheduler.order(organizations)
+        if args.order != 'file':
+            print(f'[ℹ] Scanning {args.order} organizations first by estimated cost')
+            print()
     try:
-        for i, organization in enumerate(organizations, 1):
-            while True:
-                random_string = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-                if random_string not in used_random_strings:
-                    used_random_strings.add(random_string)
-                    break
-            temp_th_output = f'ghoss/temp/temp_trufflehog_{random_string}.json'
-            temp_kf_output = f'ghoss/temp/temp_kingfisher_{random_string}.json'
-            temp_files.extend([temp_th_output, temp_kf_output])
-            print(f'[#] [{i}/{total_organizations}] Processing {organization}')
-            orgs = scanner.search_orgs(organization)
-            if orgs:
-                print(f'[✓] Found {len(orgs)} organizations')
-                best_match = scanner.find_best_matching_org(organization, orgs)
-                if best_match:
-                    best_match_index = orgs.index(best_match) if best_match in orgs[:10] else 0
-                    print(f'[✓] Best match: {best_match}')
-                    print(f'[?] Use arrow keys to select organization:')
-
-                    selected_index = get_arrow_key_selection(orgs, best_match_index)
-                    selected_org = orgs[selected_index]
-
-                    if selected_org in orgs:
-                        repo_count = scanner.get_repo_count(selected_org)
-                        if repo_count > 0:
-                            print(f'[*] Scanning {repo_count} code repositories...')
-                        else:
-                            print(f'[*] Scanning organization: {selected_org}')
-                        th_success, th_secrets = scanner.run_trufflehog(selected_org, temp_th_output)
-                        th_secrets = th_secrets if th_success else []
-                        kf_success, kf_secrets = scanner.run_kingfisher(selected_org, organization, temp_kf_output)
-                        kf_secrets = kf_secrets if kf_success and isinstance(kf_secrets, list) else []
-                        all_th_secrets.extend(th_secrets)
-                        all_kf_secrets.extend(kf_secrets)
-                        org_result = {
-                            'organization': selected_org or organization or 'unknown',
-                            'scan_status': 'success' if (th_success or kf_success) else 'failed',
-                            'trufflehog_secrets_count': len(th_secrets),
-                            'trufflehog_secrets': th_secrets,
-                            'kingfisher_secrets_count': len(kf_secrets),
-                            'kingfisher_secrets': kf_secrets
-                        }
-                        all_results['results'].append(org_result)
-                        if not th_secrets and not kf_secrets:
-                            if th_success:
-                                print(f'[!] TruffleHog found no secrets')
-                            if kf_success:
-                                print(f'[!] Kingfisher found no secrets')
-                        else:
-                            if th_secrets:
-                                print(f'[✓] TruffleHog found {len(th_secrets)} secrets')
-                            if kf_secrets:
-                                print(f'[✓] Kingfisher found {len(kf_secrets)} secrets')
-                        if th_success or kf_success:
-                            successful_scans += 1
+        if args.worker:
+            print(f'[ℹ] Working on run {run_id} as {worker}')
+            print()
+            processed = run_worker(
+                context, queue, run_id, worker, args.jobs,
+                lambda: allocate_temp_outputs(used_random_strings, temp_files),
+                org_mapping, resolved
+            )
+            scan_history.save()
+            if dedup_index:
+                dedup_index.save()
+            counts = queue.counts(run_id)
+            unfinished = counts.get('pending', 0) + counts.get('leased', 0)
+            print()
+            print(f'[ℹ] Worker {worker} processed {processed} organization(s) of run {run_id}')
+            print(f'[ℹ] Run {run_id}: {counts.get("done", 0)} done, {counts.get("failed", 0)} abandoned, {unfinished} unfinished')
+            if not unfinished:
+                print(f'[✓] Run {run_id} is complete, merge it with --merge {args.worker} --run {run_id}')
+            return
+        elif args.merge:
+            from distributed import merge_run
+            merged, workers = merge_run(queue, run_id, journal, metrics_filename)
+            print(f'[ℹ] Merged {merged} of {total_organizations} organization result(s) from {workers} worker journal(s)')
+            print()
+        elif args.use_async:
+            from engine import run_async
+            work = []
+            for index, organization in schedule:
+                if journal.is_completed(index, organization):
+                    print(f'[#] [{index + 1}/{total_organizations}] Skipping {organization}, already completed')
+                    continue
+                work.append((index, organization) + allocate_temp_outputs(used_random_strings, temp_files))
+            if not run_async(context, work, total_organizations, args.jobs, interactive, org_mapping, resolved):
+                sys.stdout.write('\r\033[K')
+                print(f'[!] Scan was interrupted...')
+                sys.exit(1)
+            print()
+        else:
+            with ThreadPoolExecutor(max_workers=args.jobs, thread_name_prefix='ghoss-org') as executor:
+                executors.append(executor)
+                futures = []
+                for index, organization in schedule:
+                    if journal.is_completed(index, organization):
+                        print(f'[#] [{index + 1}/{total_organizations}] Skipping {organization}, already completed')
+                        continue
+                    temp_th_output, temp_kf_output = allocate_temp_outputs(used_random_strings, temp_files)
+                    print(f'[#] [{index + 1}/{total_organizations}] Processing {organization}')
+                    org_metrics = ScanMetrics(organization)
+                    with metrics.bind(org_metrics):
+                        selected_org, outcome = resolve_organization(scanner, organization, interactive, org_mapping, resolved)
+                    if selected_org:
+                        org_metrics.organization = selected_org
+                        label = f'{selected_org}: ' if pipelined else ''
+                        org_metrics.mark_queued()
+                        future = executor.submit(
+                            scan_and_record, context, index, selected_org, organization,
+                            temp_th_output, temp_kf_output, label, org_metrics
+                        )
+                        if pipelined:
+                            futures.append(future)
                         else:
-                            failed_scans += 1
+                            future.result()
                     else:
-                        print(f'[!] Organization "{selected_org}" not found')
-                        all_results['results'].append({
-                            'organization': selected_org or organization or 'unknown',
-                            'scan_status': 'org_not_found',
-                            'trufflehog_secrets_count': 0,
-                            'trufflehog_secrets': [],
-                            'kingfisher_secrets_count': 0,
-                            'kingfisher_secrets': []
-                        })
-                        failed_scans += 1
-                else:
-                    print(f'[!] No matching organizations, skipping')
-                    all_results['results'].append({
-                        'organization': organization or 'unknown',
-                        'scan_status': 'no_matching_orgs',
-                        'trufflehog_secrets_count': 0,
-                        'trufflehog_secrets': [],
-                        'kingfisher_secrets_count': 0,
-                        'kingfisher_secrets': [],
-                        'available_orgs': orgs[:5]
-                    })
-                    skipped_scans += 1
-            else:
-                print(f'[!] No organizations found')
-                all_results['results'].append({
-                    'organization': organization or 'unknown',
-                    'scan_status': 'no_orgs_found',
-                    'trufflehog_secrets_count': 0,
-                    'trufflehog_secrets': [],
-                    'kingfisher_secrets_count': 0,
-                    'kingfisher_secrets': []
-                })
-                failed_scans += 1
-            print()
-        all_results['scan_info'].update({
-            'successful_scans': successful_scans,
-            'failed_scans': failed_scans,
-            'skipped_scans': skipped_scans,
-            'trufflehog_secrets_found': sum(result.get('trufflehog_secrets_count', 0) for result in all_results['results']),
-            'kingfisher_secrets_found': sum(result.get('kingfisher_secrets_count', 0) for result in all_results['results'])
-        })
-        save_results_to_files(all_th_secrets, all_kf_secrets, all_results, th_output_filename, kf_output_filename, combined_output_filename)
+                        record_result(context, index, organization, *outcome, org_metrics)
+                    if not pipelined:
+                        print()
+                for future in futures:
+                    future.result()
+                if pipelined:
+                    print()
+        scan_info.update(journal.summary())
+        successful_scans = scan_info['successful_scans']
+        scan_history.save()
+        if dedup_index:
+            scan_info['duplicate_secrets_suppressed'] = journal.duplicates_suppressed()
+            dedup_index.save()
+        with context.run_metrics.phase('write_results'):
+            if args.output_format in ('json', 'both'):
+                write_results_from_journal(
+                    journal, scan_info, th_output_filename, kf_output_filename, combined_output_filename,
+                    dedup_index.annotate if dedup_index else None
+                )
+            if args.output_format in ('compact', 'both'):
+                write_compact_results(journal, scan_info, compact_output_filename, dedup_index.annotate if dedup_index else None)
+        write_prometheus(prometheus_filename, context.run_metrics, read_metrics_lines(metrics_filename))
         print(f'[ℹ] Scan Summary:')
         print(f'[ℹ] Total organizations scanned: {total_organizations}')
         print(f'[✓] Successful scans: {successful_scans}')
-        print(f'[⚠] Skipped scans: {skipped_scans}')
-        print(f'[✗] Failed scans: {failed_scans}')
-        total_secrets = all_results['scan_info']['trufflehog_secrets_found'] + all_results['scan_info']['kingfisher_secrets_found']
+        print(f'[⚠] Skipped scans: {scan_info["skipped_scans"]}')
+        print(f'[✗] Failed scans: {scan_info["failed_scans"]}')
+        total_secrets = scan_info['trufflehog_secrets_found'] + scan_info['kingfisher_secrets_found']
         if total_secrets > 0:
             print(f'[✓] Total secrets found: {total_secrets}')
-            print(f'[✓] TruffleHog secrets: {all_results["scan_info"]["trufflehog_secrets_found"]}')
-            print(f'[✓] Kingfisher secrets: {all_results["scan_info"]["kingfisher_secrets_found"]}')
+            print(f'[✓] TruffleHog secrets: {scan_info["trufflehog_secrets_found"]}')
+            print(f'[✓] Kingfisher secrets: {scan_info["kingfisher_secrets_found"]}')
         if total_organizations > 0:
             success_rate = (successful_scans/total_organizations*100)
             print(f'[ℹ] Success rate: {success_rate:.1f}%')
     finally:
         print(f'[*] Cleaning up temporary files...')
         cleanup_temp_files(temp_files)
+        journal.close()
+        if scan_state:
+            scan_state.close()
+        if mirror_cache:
+            mirror_cache.evict()
+        if api_cache:
+            api_cache.close()
+        if queue:
+            queue.close()
         print(f'[✓] Scan process completed.\n')
 
 if __name__ == '__main__':
@@ -0,0 +1,193 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils import log_error
+
+_current = contextvars.ContextVar('ghoss_metrics', default=None)
+
+
+class ScanMetrics:
+    def __init__(self, organization=None):
+        self.organization = organization
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.queued_at = None
+        self.queue_wait_seconds = 0.0
+        self.phases = {}
+        self.api_calls = 0
+        self.rate_limit_waits = 0
+        self.rate_limit_wait_seconds = 0.0
+
+    def mark_queued(self):
+        self.queued_at = time.time()
+
+    def mark_dequeued(self):
+        if self.queued_at is None:
+            return
+        waited = time.time() - self.queued_at
+        self.queued_at = None
+        self.queue_wait_seconds += waited
+        self.started += waited
+
+    def _phase(self, name):
+        return self.phases.setdefault(name, {
+            'calls': 0,
+            'wall_seconds': 0.0,
+            'cpu_user_seconds': 0.0,
+            'cpu_system_seconds': 0.0,
+            'peak_rss_kb': 0,
+            'bytes_parsed': 0,
+            'findings': 0
+        })
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                phase = self._phase(name)
+                phase['calls'] += 1
+                phase['wall_seconds'] += elapsed
+
+    def record_process(self, name, rusage):
+        with self.lock:
+            phase = self._phase(name)
+            phase['cpu_user_seconds'] += rusage.ru_utime
+            phase['cpu_system_seconds'] += rusage.ru_stime
+            phase['peak_rss_kb'] = max(phase['peak_rss_kb'], rusage.ru_maxrss)
+
+    def record_output(self, name, bytes_parsed=0, findings=0):
+        with self.lock:
+            phase = self._phase(name)
+            phase['bytes_parsed'] += bytes_parsed
+            phase['findings'] += findings
+
+    def record_api_call(self, wait_seconds=0.0):
+        with self.lock:
+            self.api_calls += 1
+            if wait_seconds:
+                self.rate_limit_waits += 1
+                self.rate_limit_wait_seconds += wait_seconds
+
+    def merge(self, other):
+        with self.lock, other.lock:
+            for name, values in other.phases.items():
+                phase = self._phase(name)
+                for key, value in values.items():
+                    phase[key] = max(phase[key], value) if key == 'peak_rss_kb' else phase[key] + value
+            self.api_calls += other.api_calls
+            self.rate_limit_waits += other.rate_limit_waits
+            self.rate_limit_wait_seconds += other.rate_limit_wait_seconds
+
+    def to_dict(self):
+        with self.lock:
+            phases = {}
+            for name, values in self.phases.items():
+                phase = dict(values)
+                phase['wall_seconds'] = round(phase['wall_seconds'], 3)
+                phase['cpu_user_seconds'] = round(phase['cpu_user_seconds'], 3)
+                phase['cpu_system_seconds'] = round(phase['cpu_system_seconds'], 3)
+                if phase['findings'] and phase['wall_seconds']:
+                    phase['findings_per_second'] = round(phase['findings'] / phase['wall_seconds'], 1)
+                phases[name] = phase
+            return {
+                'wall_seconds': round(time.time() - self.started, 3),
+                'queue_wait_seconds': round(self.queue_wait_seconds, 3),
+                'api_calls': self.api_calls,
+                'rate_limit_waits': self.rate_limit_waits,
+                'rate_limit_wait_seconds': round(self.rate_limit_wait_seconds, 3),
+                'phases': phases
+            }
+
+
+def current():
+    return _current.get()
+
+@contextmanager
+def bind(metrics):
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def phase(name):
+    metrics = current()
+    if metrics is None:
+        yield None
+        return
+    with metrics.phase(name):
+        yield metrics
+
+def submit(executor, fn, *args, **kwargs):
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def append_metrics_line(path, org_metrics):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'organization': org_metrics.organization, **org_metrics.to_dict()}, ensure_ascii=False) + '\n')
+    except OSError as e:
+        log_error(f'Error writing metrics to {path}: {str(e)}')
+
+def read_metrics_lines(path):
+    org_metrics = []
+    if not os.path.exists(path):
+        return org_metrics
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                org_metrics.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return org_metrics
+
+def write_prometheus(path, run_metrics, org_metrics):
+    lines = []
+
+    def emit(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape_label(label)}"' for key, label in labels.items())
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+    totals = run_metrics.to_dict()
+    emit('ghoss_run_wall_seconds', 'gauge', 'Wall time of the whole run.', [({}, totals['wall_seconds'])])
+    emit('ghoss_api_calls_total', 'counter', 'GitHub API requests sent.', [({}, totals['api_calls'])])
+    emit('ghoss_rate_limit_waits_total', 'counter', 'Requests delayed by rate limiting.', [({}, totals['rate_limit_waits'])])
+    emit('ghoss_rate_limit_wait_seconds_total', 'counter', 'Time spent waiting on rate limits.', [({}, totals['rate_limit_wait_seconds'])])
+    for key, name, kind, help_text in (
+        ('wall_seconds', 'ghoss_phase_wall_seconds_total', 'counter', 'Wall time per phase.'),
+        ('cpu_user_seconds', 'ghoss_phase_cpu_user_seconds_total', 'counter', 'Subprocess user CPU time per phase.'),
+        ('cpu_system_seconds', 'ghoss_phase_cpu_system_seconds_total', 'counter', 'Subprocess system CPU time per phase.'),
+        ('peak_rss_kb', 'ghoss_phase_peak_rss_kilobytes', 'gauge', 'Peak subprocess RSS per phase.'),
+        ('bytes_parsed', 'ghoss_phase_bytes_parsed_total', 'counter', 'Scanner output bytes parsed per phase.'),
+        ('findings', 'ghoss_phase_findings_total', 'counter', 'Findings produced per phase.')
+    ):
+        emit(name, kind, help_text, [({'phase': phase_name}, values[key]) for phase_name, values in totals['phases'].items()])
+    emit('ghoss_org_wall_seconds', 'gauge', 'Wall time per organization.', [
+        ({'organization': metrics['organization']}, metrics['wall_seconds']) for metrics in org_metrics
+    ])
+    emit('ghoss_org_phase_wall_seconds', 'gauge', 'Wall time per organization and phase.', [
+        ({'organization': metrics['organization'], 'phase': phase_name}, values['wall_seconds'])
+        for metrics in org_metrics for phase_name, values in metrics['phases'].items()
+    ])
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    except OSError as e:
+        log_error(f'Error writing metrics to {path}: {str(e)}')
@@ -0,0 +1,101 @@
+import fcntl
+import os
+import shutil
+import subprocess
+from contextlib import ExitStack, contextmanager
+
+from utils import log_error
+
+
+class MirrorCache:
+    BATCH_SIZE = 100
+
+    def __init__(self, root='ghoss/mirrors', max_bytes=50 * 1024 ** 3, git_timeout=3600):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.git_timeout = git_timeout
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, repo):
+        owner, name = repo['full_name'].lower().split('/', 1)
+        return os.path.join(self.root, owner, f'{name}.git')
+
+    @contextmanager
+    def _lock(self, path, mode):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield lock_file
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _git(self, args):
+        result = subprocess.run(['git'] + args, capture_output=True, text=True, timeout=self.git_timeout)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f'git {args[0]} failed')
+
+    def _update(self, repo, path):
+        if os.path.isdir(path):
+            self._git(['--git-dir', path, 'fetch', '--prune', '--quiet', 'origin'])
+        else:
+            temp_path = f'{path}.tmp'
+            shutil.rmtree(temp_path, ignore_errors=True)
+            self._git(['clone', '--mirror', '--quiet', repo['clone_url'], temp_path])
+            os.replace(temp_path, path)
+        os.utime(path)
+
+    @contextmanager
+    def checkout(self, repos):
+        mirrors = {}
+        with ExitStack() as stack:
+            for repo in sorted(repos, key=self.path_for):
+                path = self.path_for(repo)
+                try:
+                    with ExitStack() as repo_stack:
+                        lock_file = repo_stack.enter_context(self._lock(path, fcntl.LOCK_EX))
+                        self._update(repo, path)
+                        fcntl.flock(lock_file, fcntl.LOCK_SH)
+                        stack.enter_context(repo_stack.pop_all())
+                except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+                    log_error(f'Failed mirroring {repo["full_name"]}: {str(e)}')
+                    continue
+                mirrors[repo['full_name']] = path
+            yield mirrors
+
+    @staticmethod
+    def _directory_size(path):
+        total = 0
+        for directory, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(directory, name)).st_size
+                except OSError:
+                    pass
+        return total
+
+    def evict(self):
+        entries = []
+        for owner in os.listdir(self.root):
+            owner_dir = os.path.join(self.root, owner)
+            if not os.path.isdir(owner_dir):
+                continue
+            for name in os.listdir(owner_dir):
+                path = os.path.join(owner_dir, name)
+                if name.endswith('.git') and os.path.isdir(path):
+                    entries.append((os.path.getmtime(path), self._directory_size(path), path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with open(f'{path}.lock', 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    shutil.rmtree(path, ignore_errors=True)
+                    total -= size
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return total
@@ -0,0 +1,185 @@
+import sys
+import threading
+
+import metrics
+from journal import SECRET_KEYS
+from metrics import ScanMetrics, append_metrics_line
+from ui import get_arrow_key_selection
+from utils import log_error
+
+
+def empty_result(organization, scan_status, **extra):
+    result = {
+        'organization': organization or 'unknown',
+        'scan_status': scan_status,
+        'trufflehog_secrets_count': 0,
+        'trufflehog_secrets': None,
+        'kingfisher_secrets_count': 0,
+        'kingfisher_secrets': None
+    }
+    result.update(extra)
+    return result
+
+def resolve_organization(scanner, organization, interactive=True, org_mapping=None, resolved=None):
+    if org_mapping and organization in org_mapping:
+        selected_org = org_mapping[organization]
+        print(f'[✓] Mapped to: {selected_org}')
+        return selected_org, None
+    if resolved and organization in resolved:
+        selected_org = resolved[organization]
+        print(f'[✓] Exact match: {selected_org}')
+        return selected_org, None
+    orgs = scanner.search_orgs(organization)
+    if not orgs:
+        print(f'[!] No organizations found')
+        return None, (empty_result(organization, 'no_orgs_found'), 'failed')
+    print(f'[✓] Found {len(orgs)} organizations')
+    best_match = scanner.find_exact_matching_org(organization, orgs) or scanner.find_best_matching_org(organization, orgs)
+    if not best_match:
+        print(f'[!] No matching organizations, skipping')
+        return None, (empty_result(organization, 'no_matching_orgs', available_orgs=orgs[:5]), 'skipped')
+    best_match_index = orgs.index(best_match) if best_match in orgs[:10] else 0
+    print(f'[✓] Best match: {best_match}')
+    if not interactive:
+        ambiguous = scanner.is_ambiguous_match(organization, orgs)
+        if not ambiguous or not sys.stdin.isatty():
+            if ambiguous:
+                log_error(f'Ambiguous match for "{organization}" resolved to {best_match} without prompting')
+            return best_match, None
+    print(f'[?] Use arrow keys to select organization:')
+
+    selected_index = get_arrow_key_selection(orgs, best_match_index)
+    selected_org = orgs[selected_index]
+
+    if selected_org not in orgs:
+        print(f'[!] Organization "{selected_org}" not found')
+        return None, (empty_result(selected_org or organization, 'org_not_found'), 'failed')
+    return selected_org, None
+
+class ScanContext:
+    def __init__(self, scanner, journal, concurrent=False, dedup_index=None, scan_state=None, shards=1, metrics_filename=None, scan_history=None, scheduler=None):
+        self.scanner = scanner
+        self.journal = journal
+        self.concurrent = concurrent
+        self.dedup_index = dedup_index
+        self.scan_state = scan_state
+        self.shards = shards
+        self.metrics_filename = metrics_filename
+        self.scan_history = scan_history
+        self.scheduler = scheduler
+        self.run_metrics = ScanMetrics()
+        self.metrics_lock = threading.Lock()
+
+def plan_scan(context, selected_org, label=''):
+    scanner = context.scanner
+    scan_state = context.scan_state
+    all_repos = scanner.list_org_repos(selected_org) if scan_state or context.shards > 1 or scanner.mirror_cache else None
+    repos = None
+    if all_repos is not None and scan_state and scan_state.has_org(selected_org):
+        repos = scan_state.changed_repos(selected_org, all_repos)
+        if not repos:
+            print(f'[ℹ] {label}No repositories changed since last scan, skipping')
+            return all_repos, repos, (empty_result(selected_org, 'unchanged'), 'skipped')
+        print(f'[*] {label}Scanning {len(repos)} of {len(all_repos)} repositories changed since last scan...')
+    else:
+        repo_count = len(all_repos) if all_repos is not None else scanner.get_repo_count(selected_org)
+        if repo_count > 0:
+            print(f'[*] {label}Scanning {repo_count} code repositories...')
+        else:
+            print(f'[*] {label}Scanning organization: {selected_org}')
+    if repos is None and scanner.mirror_cache:
+        repos = all_repos
+    if scans_repo_list(context, all_repos, repos):
+        print(f'[!] {label}Scanning the listed organization repositories only, repositories of organization members are not covered')
+    return all_repos, repos, None
+
+def scans_repo_list(context, all_repos, repos):
+    return repos is not None or bool(context.shards > 1 and all_repos)
+
+def finish_scan(context, selected_org, organization, all_repos, repos, scan_outcome):
+    scan_state = context.scan_state
+    dedup_index = context.dedup_index
+    th_success, th_secrets, kf_success, kf_secrets, failed_repos = scan_outcome
+    if scan_state and all_repos is not None and th_success and kf_success and not failed_repos:
+        scan_state.mark_scanned(selected_org, repos if repos is not None else all_repos)
+    org_result = {
+        'organization': selected_org or organization or 'unknown',
+        'scan_status': 'success' if (th_success or kf_success) else 'failed',
+        'trufflehog_secrets_count': 0,
+        'trufflehog_secrets': th_secrets if th_success else None,
+        'kingfisher_secrets_count': 0,
+        'kingfisher_secrets': kf_secrets if kf_success else None
+    }
+    if dedup_index:
+        org_result['duplicate_secrets_suppressed'] = 0
+        for key, tool in SECRET_KEYS:
+            if org_result[key] is not None:
+                org_result[key] = dedup_index.unique(selected_org, tool, org_result[key], org_result)
+    if scans_repo_list(context, all_repos, repos):
+        org_result['members_covered'] = False
+    if failed_repos:
+        org_result['failed_repos'] = failed_repos
+    return org_result, 'successful' if (th_success or kf_success) else 'failed'
+
+def report_findings(org_result, scanned, label=''):
+    th_count = org_result['trufflehog_secrets_count']
+    kf_count = org_result['kingfisher_secrets_count']
+    if not th_count and not kf_count:
+        if 'trufflehog' in scanned:
+            print(f'[!] {label}TruffleHog found no secrets')
+        if 'kingfisher' in scanned:
+            print(f'[!] {label}Kingfisher found no secrets')
+    else:
+        if th_count:
+            print(f'[✓] {label}TruffleHog found {th_count} secrets')
+        if kf_count:
+            print(f'[✓] {label}Kingfisher found {kf_count} secrets')
+    duplicates = org_result.get('duplicate_secrets_suppressed')
+    if duplicates:
+        print(f'[ℹ] {label}Suppressed {duplicates} duplicate secrets')
+
+def scan_organization(context, selected_org, organization, temp_th_output, temp_kf_output, label=''):
+    scanner = context.scanner
+    all_repos, repos, skipped = plan_scan(context, selected_org, label)
+    if skipped:
+        return skipped
+    if context.shards > 1 and all_repos:
+        scan_outcome = scanner.run_sharded(
+            selected_org, organization, temp_th_output, temp_kf_output,
+            repos if repos is not None else all_repos, context.shards, concurrent=context.concurrent
+        )
+    else:
+        scan_outcome = scanner.run_scanners(
+            selected_org, organization, temp_th_output, temp_kf_output, concurrent=context.concurrent, repos=repos
+        )
+    return finish_scan(context, selected_org, organization, all_repos, repos, scan_outcome)
+
+def scan_time_limit(context, organization):
+    return context.scheduler.timeout_for(organization) if context.scheduler else None
+
+def record_result(context, index, organization, org_result, status, org_metrics, label=None):
+    scanned = [tool for key, tool in SECRET_KEYS if org_result.get(key) is not None]
+
+    def finalize(org_result):
+        org_result['metrics'] = org_metrics.to_dict()
+
+    with org_metrics.phase('write'):
+        context.journal.append(index, organization, org_result, status, finalize)
+    if label is not None:
+        report_findings(org_result, scanned, label)
+    scan_phase = org_result['metrics']['phases'].get('scan')
+    if context.scan_history and scan_phase and status == 'successful' and org_result['scan_status'] == 'success':
+        stats = context.scanner.org_stats.get(org_result['organization'].lower())
+        context.scan_history.record(organization, scan_phase['wall_seconds'], stats)
+    context.run_metrics.merge(org_metrics)
+    with context.metrics_lock:
+        append_metrics_line(context.metrics_filename, org_metrics)
+
+def scan_and_record(context, index, selected_org, organization, temp_th_output, temp_kf_output, label, org_metrics):
+    org_metrics.mark_dequeued()
+    with metrics.bind(org_metrics), org_metrics.phase('scan'), context.scanner.time_limit(scan_time_limit(context, organization)):
+        org_result, status = scan_organization(context, selected_org, organization, temp_th_output, temp_kf_output, label)
+    if context.scanner.interrupted:
+        return False
+    record_result(context, index, organization, org_result, status, org_metrics, label)
+    return True
@@ -0,0 +1,87 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+
+from utils import log_error
+
+SCANNERS = (('trufflehog', 'TruffleHog'), ('kingfisher', 'Kingfisher'))
+VERSION_LINE = re.compile(r'^[\w .-]*?\bv?(\d+\.\d+(?:\.\d+)*(?:[-+][\w.]+)?)\s*$')
+
+
+class Preflight:
+    UPDATE_INTERVAL = 24 * 60 * 60
+
+    def __init__(self, path='ghoss/preflight.json'):
+        self.path = path
+        self.records = {}
+        self.changed = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.records = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                log_error(f'Error loading preflight cache {path}: {str(e)}')
+
+    def _run(self, cmd, timeout):
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.SubprocessError) as e:
+            log_error(f'Error running {" ".join(cmd)}: {str(e)}')
+            return None
+        if result.returncode != 0:
+            log_error(f'{" ".join(cmd)} failed with return code {result.returncode}: {result.stderr.strip() or "Unknown error"}')
+            return None
+        return (result.stdout.strip() or result.stderr.strip()).splitlines()
+
+    @staticmethod
+    def parse_version(lines):
+        for line in lines or []:
+            match = VERSION_LINE.match(line.strip())
+            if match:
+                return match.group(1)
+        return 'unknown'
+
+    @staticmethod
+    def _is_version(value):
+        return value == 'unknown' or (isinstance(value, str) and bool(VERSION_LINE.match(value)))
+
+    def update_kingfisher(self):
+        if time.time() - self.records.get('kingfisher_updated', 0) < self.UPDATE_INTERVAL:
+            return False
+        path = shutil.which('kingfisher')
+        if not path or self._run([path, 'update'], 300) is None:
+            return False
+        self.records['kingfisher_updated'] = time.time()
+        self.changed = True
+        return True
+
+    def versions(self):
+        versions = {}
+        for binary, name in SCANNERS:
+            path = shutil.which(binary)
+            if not path:
+                versions[name] = None
+                continue
+            stat = os.stat(path)
+            key = [path, stat.st_size, stat.st_mtime_ns]
+            record = self.records.get(binary)
+            if not record or record.get('key') != key or not self._is_version(record.get('version')):
+                record = {'key': key, 'version': self.parse_version(self._run([path, '--version'], 30))}
+                self.records[binary] = record
+                self.changed = True
+            versions[name] = record['version']
+        return versions
+
+    def save(self):
+        if not self.changed:
+            return
+        temp_path = f'{self.path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.records, f, separators=(',', ':'), ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log_error(f'Error saving preflight cache {self.path}: {str(e)}')
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+from collections import Counter
+
+from compact import iter_compact
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query compact scan results without loading them into memory', add_help=False)
+    parser.add_argument('file', metavar='FILE', help='Compact results file (scan_results_*.jsonl.gz or .jsonl.zst)')
+    parser.add_argument('-o', metavar='ORGANIZATION', dest='orgs', action='append', help='Only show findings from this organization (repeatable)')
+    parser.add_argument('-d', metavar='DETECTOR', dest='detector', help='Only show findings whose detector name contains DETECTOR')
+    parser.add_argument('-s', metavar='SCANNER', dest='tool', choices=('trufflehog', 'kingfisher'), help='Only show findings from trufflehog or kingfisher')
+    parser.add_argument('--verified', action='store_true', help='Only show verified findings')
+    parser.add_argument('--unverified', action='store_true', help='Only show unverified findings')
+    parser.add_argument('--count', action='store_true', help='Print the number of matching findings per organization instead of the findings')
+    parser.add_argument('-h', action='help', help='Show this help message and exit')
+    args = parser.parse_args()
+    if args.verified and args.unverified:
+        print(f'[!] Cannot use both --verified and --unverified together')
+        sys.exit(1)
+
+    orgs = {org.lower() for org in args.orgs} if args.orgs else None
+    detector = args.detector.lower() if args.detector else None
+    organizations = {}
+    counts = Counter()
+    try:
+        for record in iter_compact(args.file):
+            record_type = record.get('type')
+            if record_type == 'organization':
+                organizations[record['org']] = record['organization']
+                continue
+            if record_type != 'finding':
+                continue
+            organization = organizations.get(record['org'], 'unknown')
+            if orgs is not None and organization.lower() not in orgs:
+                continue
+            if args.tool and record['tool'] != args.tool:
+                continue
+            if detector and detector not in record['detector'].lower():
+                continue
+            if (args.verified and not record['verified']) or (args.unverified and record['verified']):
+                continue
+            if args.count:
+                counts[organization] += 1
+            else:
+                record = {'organization': organization, **{key: value for key, value in record.items() if key not in ('type', 'org')}}
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except BrokenPipeError:
+        sys.stderr.close()
+        return
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f'[!] Failed reading {args.file}: {str(e)}', file=sys.stderr)
+        sys.exit(1)
+    if args.count:
+        for organization, count in counts.most_common():
+            print(f'{count}\t{organization}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import json
+import re
+
+import metrics
+from utils import log_error
+
+LOGIN_PATTERN = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9]|-(?=[A-Za-z0-9])){0,38}$')
+
+
+class OrgResolver:
+    BATCH_SIZE = 50
+    CACHE_TTL = 24 * 3600
+    FIELDS = 'login repositories { totalCount totalDiskUsage } forks: repositories(isFork: true) { totalCount }'
+
+    def __init__(self, api, batch_size=BATCH_SIZE):
+        self.api = api
+        self.batch_size = batch_size
+
+    @staticmethod
+    def candidate_logins(name):
+        name = name.strip()
+        candidates = []
+        for login in (name, name.replace(' ', '-'), name.replace(' ', '')):
+            if LOGIN_PATTERN.match(login) and login.lower() not in (candidate.lower() for candidate in candidates):
+                candidates.append(login)
+        return candidates
+
+    @staticmethod
+    def _cache_key(login):
+        return f'graphql:organization/{login.lower()}'
+
+    @staticmethod
+    def _stats(organization):
+        return {
+            'login': organization['login'],
+            'repo_count': organization['repositories']['totalCount'],
+            'disk_usage': organization['repositories']['totalDiskUsage'] or 0,
+            'fork_count': organization['forks']['totalCount']
+        }
+
+    def _query(self, logins):
+        query = 'query {\n' + '\n'.join(
+            f'  o{index}: organization(login: {json.dumps(login)}) {{ {self.FIELDS} }}' for index, login in enumerate(logins)
+        ) + '\n}'
+        with metrics.phase('resolve'):
+            response = self.api.post('/graphql', json={'query': query})
+        if response.status_code != 200:
+            log_error(f'GraphQL organization lookup failed: HTTP {response.status_code}')
+            return None
+        body = response.json()
+        data = body.get('data')
+        if data is None:
+            log_error(f'GraphQL organization lookup failed: {body.get("errors")}')
+            return None
+        return {login: data.get(f'o{index}') for index, login in enumerate(logins)}
+
+    def resolve(self, names):
+        cache = self.api.cache
+        found = {}
+        pending = {}
+        for name in names:
+            for login in self.candidate_logins(name):
+                key = login.lower()
+                if key in found or key in pending:
+                    continue
+                cached = cache.get(self._cache_key(login)) if cache else None
+                if cached and cached['fresh']:
+                    found[key] = cached['data']
+                else:
+                    pending[key] = None
+        pending = list(pending)
+        for start in range(0, len(pending), self.batch_size):
+            try:
+                results = self._query(pending[start:start + self.batch_size])
+            except Exception as e:
+                log_error(f'Error resolving organizations through GraphQL: {str(e)}')
+                results = None
+            if results is None:
+                break
+            for login, organization in results.items():
+                if organization:
+                    found[login] = self._stats(organization)
+                    if cache:
+                        cache.set(self._cache_key(login), found[login], ttl=self.CACHE_TTL)
+        resolved = {}
+        for name in names:
+            for login in self.candidate_logins(name):
+                if login.lower() in found:
+                    resolved[name] = found[login.lower()]
+                    break
+        return resolved
@@ -1,75 +1,229 @@
+import contextvars
+import heapq
 import json
 import os
 import subprocess
-import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
 
-import requests
+import metrics
+from config import CONFIG, Colors
+from github_api import GitHubAPIClient
+from kingfisher_report import iter_kingfisher_matches
+from tokens import TokenPool
+from utils import log_error, wait_process
 
-from config import Colors
-from utils import log_error
+_time_limit = contextvars.ContextVar('ghoss_time_limit', default=None)
+
+
+def advance_steps(steps, value=None, error=None):
+    try:
+        return False, steps.throw(error) if error else steps.send(value)
+    except StopIteration as stop:
+        return True, stop.value
 
 
 class GitHubScanner:
-    def __init__(self, github_token=None, kf_github_token=None, timeout=None):
+    SEARCH_CACHE_TTL = 7 * 24 * 3600
+    ORG_CACHE_TTL = 24 * 3600
+
+    def __init__(self, github_token=None, kf_github_token=None, timeout=None, api_client=None, mirror_cache=None, th_tokens=None, kf_tokens=None):
         self.github_token = github_token
+        self.mirror_cache = mirror_cache
         self.kf_github_token = kf_github_token
         self.timeout = timeout
-        self.headers = {'Accept': 'application/vnd.github.v3+json'}
-        if github_token:
-            self.headers['Authorization'] = f'token {github_token}'
+        self.th_tokens = th_tokens or TokenPool([github_token])
+        self.kf_tokens = kf_tokens or TokenPool([kf_github_token])
+        self.api = api_client or GitHubAPIClient(github_token, CONFIG['GITHUB_API_URL'], tokens=self.th_tokens)
+        self.org_stats = {}
+        self.processes = set()
+        self.process_lock = threading.Lock()
+        self.interrupted = False
+
+    def scan_timeout(self):
+        return _time_limit.get() or self.timeout
+
+    @contextmanager
+    def time_limit(self, seconds):
+        token = _time_limit.set(seconds)
+        try:
+            yield seconds
+        finally:
+            _time_limit.reset(token)
 
     def get_repo_count(self, org):
-        url = f'https://api.github.com/orgs/{org}'
+        stats = self.org_stats.get(org.lower())
+        if stats:
+            return stats['repo_count']
         try:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code == 200:
-                return response.json().get('public_repos', 0)
+            with metrics.phase('repo_count'):
+                status_code, data = self.api.get_json(f'/orgs/{org}', ttl=self.ORG_CACHE_TTL)
+            if status_code == 200:
+                return data.get('public_repos', 0)
             return 0
         except Exception:
             return 0
 
+    def list_org_repos(self, org):
+        repos = []
+        page = 1
+        try:
+            while True:
+                with metrics.phase('list_repos'):
+                    status_code, data = self.api.get_json(f'/orgs/{org}/repos', params={'type': 'all', 'per_page': 100, 'page': page}, ttl=0)
+                if status_code != 200:
+                    log_error(f'Failed listing repositories for {org}: HTTP {status_code}')
+                    return None
+                repos.extend({
+                    'name': repo['name'],
+                    'full_name': repo['full_name'],
+                    'html_url': repo['html_url'],
+                    'clone_url': repo['clone_url'],
+                    'size': repo.get('size', 0),
+                    'pushed_at': repo.get('pushed_at'),
+                    'fork': repo.get('fork', False)
+                } for repo in data)
+                if len(data) < 100:
+                    return repos
+                page += 1
+        except Exception as e:
+            log_error(f'Error listing repositories for {org}: {str(e)}')
+            return None
+
     def search_orgs(self, organization):
-        url = f'https://api.github.com/search/users?q={organization.replace(" ", "+")}+type:org'
         try:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code == 403:
-                print(f'[!] Rate limit hit, waiting 60 seconds...')
-                time.sleep(60)
-                response = requests.get(url, headers=self.headers)
-
-            if response.status_code == 200:
-                return [item['login'] for item in response.json().get('items', []) if item.get('type') == 'Organization']
+            with metrics.phase('search'):
+                status_code, data = self.api.get_json('/search/users', params={'q': f'{organization} type:org'}, ttl=self.SEARCH_CACHE_TTL)
+            if status_code == 200:
+                return [item['login'] for item in data.get('items', []) if item.get('type') == 'Organization']
             return []
         except Exception as e:
             log_error(f'Error searching organizations: {str(e)}')
             return []
 
+    @staticmethod
+    def normalize_org_name(name):
+        return name.lower().replace(' ', '').replace('-', '').replace('_', '')
+
+    def find_exact_matching_org(self, organization, orgs):
+        organization_lower = self.normalize_org_name(organization)
+        for org in orgs or []:
+            if self.normalize_org_name(org) == organization_lower:
+                return org
+        return None
+
     def find_best_matching_org(self, organization, orgs):
         if not orgs:
             return None
-        organization_lower = organization.lower().replace(' ', '').replace('-', '').replace('_', '')
+        organization_lower = self.normalize_org_name(organization)
         for org in orgs:
-            org_lower = org.lower().replace('-', '').replace('_', '')
+            org_lower = self.normalize_org_name(org)
             if organization_lower in org_lower or org_lower in organization_lower:
                 return org
         return None
 
+    def is_ambiguous_match(self, organization, orgs):
+        if self.find_exact_matching_org(organization, orgs):
+            return False
+        organization_lower = self.normalize_org_name(organization)
+        candidates = [org for org in orgs if organization_lower in self.normalize_org_name(org) or self.normalize_org_name(org) in organization_lower]
+        return len(candidates) > 1
+
+    def parse_trufflehog_line(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            log_error(f'Invalid JSON in TruffleHog output: {line[:100]}... Error: {str(e)}')
+            return None
+
     def parse_trufflehog_output(self, output):
         secrets = []
         if not output or not output.strip():
             return secrets
         for line in output.strip().split('\n'):
-            if line.strip():
-                try:
-                    secrets.append(json.loads(line.strip()))
-                except json.JSONDecodeError as e:
-                    log_error(f'Invalid JSON in TruffleHog output: {line[:100]}... Error: {str(e)}')
-                    continue
+            secret = self.parse_trufflehog_line(line)
+            if secret is not None:
+                secrets.append(secret)
         return secrets
 
-    def run_trufflehog(self, org, output_file):
-        abs_output_file = os.path.abspath(output_file)
-        os.makedirs(os.path.dirname(abs_output_file), exist_ok=True)
+    @staticmethod
+    def iter_trufflehog_output(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+    def kill_processes(self):
+        with self.process_lock:
+            self.interrupted = True
+            processes = list(self.processes)
+        for process in processes:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+
+    def _stream_command(self, cmd, on_line, env=None, phase=None):
+        with self.process_lock:
+            if self.interrupted:
+                raise RuntimeError('Scan was interrupted')
+            process = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                encoding='utf-8', errors='replace', env=env
+            )
+            self.processes.add(process)
+        stderr_tail = deque(maxlen=50)
+        stderr_thread = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+        stderr_thread.start()
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            process.kill()
+
+        timeout = self.scan_timeout()
+        timer = threading.Timer(timeout, kill_on_timeout) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        rusage = None
+        bytes_read = 0
+        try:
+            for line in process.stdout:
+                bytes_read += len(line)
+                on_line(line)
+            rusage = wait_process(process)
+        finally:
+            if timer:
+                timer.cancel()
+            if rusage is None:
+                process.kill()
+                rusage = wait_process(process)
+            process.stdout.close()
+            stderr_thread.join(timeout=5)
+            with self.process_lock:
+                self.processes.discard(process)
+            scan_metrics = metrics.current()
+            if scan_metrics and phase:
+                scan_metrics.record_process(phase, rusage)
+                scan_metrics.record_output(phase, bytes_parsed=bytes_read)
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return process.returncode, ''.join(stderr_tail)
+
+    def trufflehog_commands(self, org, repos=None, local_repos=None, token=None):
+        if local_repos is not None:
+            return [
+                (["trufflehog", "git", f"file://{path}", "--results=verified", "-j"], repo)
+                for repo, path in local_repos
+            ]
         cmd = [
             "trufflehog", "github",
             "--results=verified",
@@ -78,25 +232,65 @@ class GitHubScanner:
             f"--org={org}",
             "-j"
         ]
+        if repos is not None:
+            cmd = ["trufflehog", "github", "--results=verified", "-j"]
+            cmd.extend(f"--repo={repo['html_url']}" for repo in repos)
+
+        if token:
+            cmd.append(f'--token={token}')
+        return [(cmd, None)]
+
+    def trufflehog_line_handler(self, output, on_secret=None, repo=None):
+        def handle_line(line):
+            secret = self.parse_trufflehog_line(line)
+            if secret is None:
+                return
+            git_metadata = secret.get('SourceMetadata', {}).get('Data', {}).get('Git')
+            if repo and isinstance(git_metadata, dict):
+                git_metadata['repository'] = repo['html_url']
+                line = json.dumps(secret)
+            output.write(line if line.endswith('\n') else line + '\n')
+            output.flush()
+            if on_secret:
+                on_secret(secret)
+        return handle_line
+
+    def trufflehog_steps(self, org, output_file, on_secret=None, repos=None, local_repos=None, failed_repos=None):
+        abs_output_file = os.path.abspath(output_file)
+        os.makedirs(os.path.dirname(abs_output_file), exist_ok=True)
+        found = 0
+
+        def count_secret(secret):
+            nonlocal found
+            found += 1
+            if on_secret:
+                on_secret(secret)
 
-        if self.github_token:
-            cmd.append(f'--token={self.github_token}')
         try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=self.timeout
-            )
-            if result.returncode != 0:
-                log_error(f'TruffleHog failed with return code {result.returncode}: {result.stderr.strip() or result.stdout.strip() or "Unknown error"}')
+            with open(abs_output_file, 'w', encoding='utf-8') as output, self.th_tokens.lease() as token:
+                commands = self.trufflehog_commands(org, repos, local_repos, token)
+                failures = []
+                for command, repo in commands:
+                    handle_line = self.trufflehog_line_handler(output, count_secret, repo)
+                    returncode, stderr = yield command, handle_line, None
+                    if returncode != 0:
+                        failures.append((repo, returncode, stderr))
+            if failures and (len(failures) == len(commands) or failed_repos is None):
+                _, returncode, stderr = failures[-1]
+                log_error(f'TruffleHog failed with return code {returncode}: {stderr.strip() or "Unknown error"}')
                 print(f'[!] TruffleHog completed scan with errors')
                 return False, []
-            with open(abs_output_file, 'w', encoding='utf-8') as f:
-                f.write(result.stdout)
-            with open(abs_output_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-            secrets = self.parse_trufflehog_output(content)
-            return True, secrets
-        except subprocess.TimeoutExpired:
-            timeout_msg = f'TruffleHog scan timed out after {self.timeout} seconds' if self.timeout else 'TruffleHog scan timed out'
+            for repo, returncode, stderr in failures:
+                log_error(f'TruffleHog failed scanning {repo["full_name"]} with return code {returncode}: {stderr.strip() or "Unknown error"}')
+                failed_repos.append(repo['name'])
+            if failures:
+                print(f'[!] TruffleHog failed scanning {len(failures)} of {len(commands)} repositories')
+            scan_metrics = metrics.current()
+            if scan_metrics:
+                scan_metrics.record_output('trufflehog', findings=found)
+            return True, self.iter_trufflehog_output(abs_output_file)
+        except subprocess.TimeoutExpired as e:
+            timeout_msg = f'TruffleHog scan timed out after {e.timeout} seconds' if e.timeout else 'TruffleHog scan timed out'
             log_error(timeout_msg)
             print(f'[!] TruffleHog completed scan with errors')
             return False, []
@@ -105,56 +299,64 @@ class GitHubScanner:
             print(f'[!] TruffleHog completed scan with errors')
             return False, []
 
-    def run_kingfisher(self, org, _, output_file):
-        abs_output_file = os.path.abspath(output_file)
-        os.makedirs(os.path.dirname(abs_output_file), exist_ok=True)
+    def run_trufflehog(self, org, output_file, on_secret=None, repos=None, local_repos=None, failed_repos=None):
+        return self.run_steps('trufflehog', self.trufflehog_steps(org, output_file, on_secret, repos, local_repos, failed_repos))
 
+    def kingfisher_command(self, org, output_file, repos=None, local_repos=None, token=None):
         cmd = [
             "kingfisher", "scan",
             "--github-organization", org,
-            "--self-update",
+            "--no-update-check",
             "--quiet",
             "--only-valid",
-            "--format", "json",
-            "--output", abs_output_file
+            "--format", "jsonl",
+            "--output", output_file
         ]
+        if repos is not None:
+            cmd[2:4] = [arg for repo in repos for arg in ("--git-url", repo['clone_url'])]
+        if local_repos is not None:
+            cmd[2:4] = [path for _, path in local_repos]
 
         env = os.environ.copy()
-        env["KF_GITHUB_TOKEN"] = self.kf_github_token
+        env["KF_GITHUB_TOKEN"] = token or ''
+        return cmd, env
+
+    def read_kingfisher_output(self, output_file, local_repos=None):
+        scan_metrics = metrics.current()
+        if scan_metrics:
+            scan_metrics.record_output('kingfisher', bytes_parsed=os.path.getsize(output_file))
+        return self._iter_kingfisher_output(output_file, local_repos, scan_metrics)
 
+    def _iter_kingfisher_output(self, output_file, local_repos, scan_metrics):
+        found = 0
         try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=self.timeout, env=env
-            )
-            if result.returncode not in (0, 200, 205):
-                error_msg = result.stderr.strip() if result.stderr else result.stdout.strip() or 'Unknown error'
+            for match in iter_kingfisher_matches(output_file):
+                if local_repos:
+                    self._relabel_local_kingfisher(match, local_repos)
+                found += 1
+                yield match
+        except (OSError, ValueError) as e:
+            log_error(f'Error reading Kingfisher output {output_file} after {found} findings: {str(e)}')
+            print(f'[!] Kingfisher output was truncated after {found} findings')
+        if scan_metrics:
+            scan_metrics.record_output('kingfisher', findings=found)
+
+    def kingfisher_steps(self, org, output_file, repos=None, local_repos=None):
+        abs_output_file = os.path.abspath(output_file)
+        os.makedirs(os.path.dirname(abs_output_file), exist_ok=True)
+        try:
+            stdout_tail = deque(maxlen=50)
+            with self.kf_tokens.lease() as token:
+                cmd, env = self.kingfisher_command(org, abs_output_file, repos, local_repos, token)
+                returncode, stderr = yield cmd, stdout_tail.append, env
+            if returncode not in (0, 200, 205):
+                error_msg = stderr.strip() or ''.join(stdout_tail).strip() or 'Unknown error'
                 log_error(f'Kingfisher failed: {error_msg}')
                 print(f'[!] Kingfisher completed scan with errors')
                 return False, []
-            with open(abs_output_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if not content:
-                    return True, []
-                try:
-                    secrets = json.loads(content)
-                    if not isinstance(secrets, list):
-                        secrets = [secrets] if secrets else []
-                    valid_secrets = []
-                    for group in secrets:
-                        if isinstance(group, dict):
-                            if 'matches' in group:
-                                for match in group.get('matches', []):
-                                    if isinstance(match, dict) and match.get('rule') and match.get('finding'):
-                                        valid_secrets.append(match)
-                            elif group.get('rule') and group.get('finding'):
-                                valid_secrets.append(group)
-                    return True, valid_secrets
-                except json.JSONDecodeError as e:
-                    log_error(f'Kingfisher JSON parsing error: {str(e)}')
-                    print(f'[!] Kingfisher completed scan with errors')
-                    return False, []
-        except subprocess.TimeoutExpired:
-            timeout_msg = f'Kingfisher scan timed out after {self.timeout} seconds' if self.timeout else 'Kingfisher scan timed out'
+            return True, self.read_kingfisher_output(abs_output_file, local_repos)
+        except subprocess.TimeoutExpired as e:
+            timeout_msg = f'Kingfisher scan timed out after {e.timeout} seconds' if e.timeout else 'Kingfisher scan timed out'
             log_error(timeout_msg)
             print(f'[!] Kingfisher completed scan with errors')
             return False, []
@@ -162,3 +364,150 @@ class GitHubScanner:
             log_error(f'Kingfisher error: {str(e)}')
             print(f'[!] Kingfisher completed scan with errors')
             return False, []
+
+    def run_kingfisher(self, org, _, output_file, repos=None, local_repos=None):
+        return self.run_steps('kingfisher', self.kingfisher_steps(org, output_file, repos, local_repos))
+
+    def run_steps(self, phase, steps):
+        value = error = None
+        with metrics.phase(phase):
+            while True:
+                done, step = advance_steps(steps, value, error)
+                if done:
+                    return step
+                value = error = None
+                try:
+                    value = self._stream_command(*step, phase=phase)
+                except Exception as e:
+                    error = e
+
+    def _relabel_local_kingfisher(self, secret, local_repos):
+        finding = secret.get('finding', {})
+        for repo, path in local_repos:
+            if finding.get('path', '').startswith(path):
+                finding['path'] = finding['path'][len(path):].lstrip('/')
+            git_metadata = finding.get('git_metadata')
+            if isinstance(git_metadata, dict) and str(git_metadata.get('repository_url', '')).rstrip('/').endswith(path):
+                git_metadata['repository_url'] = repo['clone_url']
+
+    @staticmethod
+    def split_mirrored(repos, mirrors):
+        local_repos = [(repo, mirrors[repo['full_name']]) for repo in repos if repo['full_name'] in mirrors]
+        unmirrored = [repo for repo in repos if repo['full_name'] not in mirrors]
+        return local_repos, unmirrored
+
+    def mirror_batches(self, repos, th_output_file, kf_output_file):
+        batch_size = self.mirror_cache.BATCH_SIZE
+        for index, start in enumerate(range(0, len(repos), batch_size)):
+            batch = repos[start:start + batch_size]
+            if index:
+                yield batch, self.shard_output_file(th_output_file, f'batch{index}'), self.shard_output_file(kf_output_file, f'batch{index}')
+            else:
+                yield batch, th_output_file, kf_output_file
+
+    def run_scanners(self, org, organization, th_output_file, kf_output_file, concurrent=False, repos=None):
+        if repos is None or not self.mirror_cache:
+            return self._run_scanners(org, organization, th_output_file, kf_output_file, concurrent, repos=repos)
+        groups = []
+        results = []
+        unmirrored = []
+        for batch, batch_th_output, batch_kf_output in self.mirror_batches(repos, th_output_file, kf_output_file):
+            with self.mirror_cache.checkout(batch) as mirrors:
+                local_repos, failed = self.split_mirrored(batch, mirrors)
+                if local_repos:
+                    groups.append([repo for repo, _ in local_repos])
+                    results.append(self._run_scanners(
+                        org, organization, batch_th_output, batch_kf_output, concurrent, local_repos=local_repos
+                    ))
+            unmirrored.extend(failed)
+        if unmirrored:
+            print(f'[!] Failed mirroring {len(unmirrored)} repositories, scanning them remotely')
+            groups.append(unmirrored)
+            results.append(self._run_scanners(
+                org, organization, self.shard_output_file(th_output_file, 'remote'),
+                self.shard_output_file(kf_output_file, 'remote'), concurrent, repos=unmirrored
+            ))
+        return self.combine_outcomes(org, groups, results, 'mirror batch')
+
+    def _run_scanners(self, org, organization, th_output_file, kf_output_file, concurrent=False, repos=None, local_repos=None):
+        failed_repos = []
+        if not concurrent:
+            th_success, th_secrets = self.run_trufflehog(org, th_output_file, repos=repos, local_repos=local_repos, failed_repos=failed_repos)
+            kf_success, kf_secrets = self.run_kingfisher(org, organization, kf_output_file, repos=repos, local_repos=local_repos)
+            return th_success, th_secrets, kf_success, kf_secrets, failed_repos
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='ghoss-scanner') as executor:
+            th_future = metrics.submit(executor, self.run_trufflehog, org, th_output_file, repos=repos, local_repos=local_repos, failed_repos=failed_repos)
+            kf_future = metrics.submit(executor, self.run_kingfisher, org, organization, kf_output_file, repos=repos, local_repos=local_repos)
+            th_success, th_secrets = self._collect_scanner_result(th_future, 'TruffleHog')
+            kf_success, kf_secrets = self._collect_scanner_result(kf_future, 'Kingfisher')
+        return th_success, th_secrets, kf_success, kf_secrets, failed_repos
+
+    @staticmethod
+    def shard_repos(repos, shard_count):
+        shards = [[] for _ in range(max(1, min(shard_count, len(repos))))]
+        heap = [(0, index) for index in range(len(shards))]
+        for repo in sorted(repos, key=lambda repo: repo.get('size') or 0, reverse=True):
+            size, index = heapq.heappop(heap)
+            shards[index].append(repo)
+            heapq.heappush(heap, (size + max(repo.get('size') or 0, 1), index))
+        return [shard for shard in shards if shard]
+
+    @staticmethod
+    def shard_output_file(output_file, shard_index):
+        base, ext = os.path.splitext(output_file)
+        return f'{base}_shard{shard_index}{ext}'
+
+    @staticmethod
+    def combine_outcomes(org, groups, results, kind='shard'):
+        th_success = kf_success = not results
+        th_secrets = []
+        kf_secrets = []
+        failed_repos = []
+        failed_groups = 0
+        for index, result in enumerate(results):
+            if isinstance(result, BaseException):
+                log_error(f'{kind.capitalize()} {index} of {org} failed: {str(result)}')
+                result = (False, [], False, [], [])
+            group_th_success, group_th_secrets, group_kf_success, group_kf_secrets, group_failed_repos = result
+            if group_th_success:
+                th_success = True
+                th_secrets.append(group_th_secrets)
+            if group_kf_success:
+                kf_success = True
+                kf_secrets.append(group_kf_secrets)
+            if not (group_th_success and group_kf_success):
+                failed_repos.extend(repo['name'] for repo in groups[index])
+            failed_repos.extend(group_failed_repos)
+            if not (group_th_success and group_kf_success) or group_failed_repos:
+                failed_groups += 1
+        failed_repos = list(dict.fromkeys(failed_repos))
+        if failed_repos:
+            log_error(f'{failed_groups} of {len(groups)} {kind} scans of {org} completed with errors, failed repositories: {failed_repos}')
+        return th_success, chain.from_iterable(th_secrets), kf_success, chain.from_iterable(kf_secrets), failed_repos
+
+    def run_sharded(self, org, organization, th_output_file, kf_output_file, repos, shard_count, concurrent=False):
+        shards = self.shard_repos(repos, shard_count)
+        results = []
+        with ThreadPoolExecutor(max_workers=len(shards) or 1, thread_name_prefix='ghoss-shard') as executor:
+            futures = [
+                metrics.submit(
+                    executor, self.run_scanners, org, organization,
+                    self.shard_output_file(th_output_file, index), self.shard_output_file(kf_output_file, index),
+                    concurrent, shard
+                )
+                for index, shard in enumerate(shards)
+            ]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+        return self.combine_outcomes(org, shards, results)
+
+    def _collect_scanner_result(self, future, name):
+        try:
+            return future.result()
+        except Exception as e:
+            log_error(f'{name} error: {str(e)}')
+            print(f'[!] {name} completed scan with errors')
+            return False, []
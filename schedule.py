@@ -0,0 +1,131 @@
+import json
+import os
+import statistics
+import threading
+from datetime import datetime
+
+from utils import log_error
+
+POLICIES = ('file', 'shortest', 'longest')
+
+
+def scan_mode(incremental=False, shards=1, mirror_cache=False, concurrent=False):
+    parts = []
+    if incremental:
+        parts.append('incremental')
+    if shards > 1:
+        parts.append(f'shards{shards}')
+    if mirror_cache:
+        parts.append('mirror')
+    if concurrent:
+        parts.append('concurrent')
+    return '+'.join(parts) or 'full'
+
+
+class ScanHistory:
+    SMOOTHING = 0.5
+
+    def __init__(self, path='ghoss/scan_history.json', mode='full'):
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.modes = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.modes = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                log_error(f'Error loading scan history {path}: {str(e)}')
+        if any('seconds' in record for record in self.modes.values() if isinstance(record, dict)):
+            log_error(f'Discarding scan history {path} recorded without scan modes')
+            self.modes = {}
+        self.records = self.modes.setdefault(mode, {})
+
+    def get(self, organization):
+        return self.records.get(organization.lower())
+
+    def record(self, organization, seconds, stats=None):
+        key = organization.lower()
+        with self.lock:
+            previous = self.records.get(key)
+            if previous:
+                seconds = self.SMOOTHING * seconds + (1 - self.SMOOTHING) * previous['seconds']
+            record = {'seconds': round(seconds, 3), 'runs': (previous or {}).get('runs', 0) + 1, 'updated': datetime.now().isoformat()}
+            if stats:
+                record['repo_count'] = stats['repo_count']
+                record['disk_usage'] = stats['disk_usage']
+            elif previous and 'disk_usage' in previous:
+                record['repo_count'] = previous['repo_count']
+                record['disk_usage'] = previous['disk_usage']
+            self.records[key] = record
+
+    def seconds_per_unit(self):
+        with self.lock:
+            sized = [record for record in self.records.values() if 'disk_usage' in record]
+        units = sum(CostScheduler.size_units(record) for record in sized)
+        return sum(record['seconds'] for record in sized) / units if units else None
+
+    def save(self):
+        temp_path = f'{self.path}.tmp'
+        try:
+            with self.lock:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.modes, f, separators=(',', ':'), ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log_error(f'Error saving scan history {self.path}: {str(e)}')
+
+
+class CostScheduler:
+    REPO_UNITS = 2.0
+    DEFAULT_SECONDS_PER_UNIT = 0.5
+    TIMEOUT_FACTOR = 3
+    MIN_TIMEOUT = 600
+
+    def __init__(self, history, policy='file', org_stats=None, max_timeout=None):
+        self.history = history
+        self.policy = policy
+        self.org_stats = org_stats or {}
+        self.max_timeout = max_timeout
+        self.seconds_per_unit = history.seconds_per_unit()
+        self.estimates = {}
+
+    @classmethod
+    def size_units(cls, stats):
+        return stats['repo_count'] * cls.REPO_UNITS + stats['disk_usage'] / 1024
+
+    def estimate(self, organization):
+        if organization not in self.estimates:
+            record = self.history.get(organization)
+            stats = self.org_stats.get(organization)
+            if record:
+                self.estimates[organization] = (record['seconds'], True)
+            elif stats and self.seconds_per_unit:
+                self.estimates[organization] = (self.size_units(stats) * self.seconds_per_unit, True)
+            elif stats:
+                self.estimates[organization] = (self.size_units(stats) * self.DEFAULT_SECONDS_PER_UNIT, False)
+            else:
+                self.estimates[organization] = (None, False)
+        return self.estimates[organization]
+
+    def order(self, organizations):
+        indexed = list(enumerate(organizations))
+        if self.policy == 'file':
+            return indexed
+        known = [seconds for seconds, _ in (self.estimate(organization) for organization in organizations) if seconds is not None]
+        default = statistics.median(known) if known else 0
+
+        def cost(item):
+            seconds = self.estimate(item[1])[0]
+            return seconds if seconds is not None else default
+
+        return sorted(indexed, key=cost, reverse=self.policy == 'longest')
+
+    def timeout_for(self, organization):
+        if not self.max_timeout:
+            return None
+        seconds, measured = self.estimate(organization)
+        if not measured:
+            return self.max_timeout
+        timeout = max(self.MIN_TIMEOUT, int(seconds * self.TIMEOUT_FACTOR))
+        return min(timeout, self.max_timeout)
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from utils import log_error
+
+
+class ScanState:
+    def __init__(self, path='ghoss/state.db'):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS repo_state ('
+            'org TEXT NOT NULL, repo TEXT NOT NULL, pushed_at TEXT, scanned_at TEXT NOT NULL, '
+            'PRIMARY KEY (org, repo))'
+        )
+        self.conn.commit()
+
+    def has_org(self, org):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM repo_state WHERE org = ? LIMIT 1', (org.lower(),)).fetchone() is not None
+
+    def changed_repos(self, org, repos):
+        with self.lock:
+            scanned = dict(self.conn.execute('SELECT repo, pushed_at FROM repo_state WHERE org = ?', (org.lower(),)).fetchall())
+        return [
+            repo for repo in repos
+            if repo['name'] not in scanned or not repo.get('pushed_at') or (scanned[repo['name']] or '') < repo['pushed_at']
+        ]
+
+    def mark_scanned(self, org, repos):
+        scanned_at = datetime.now().isoformat()
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO repo_state (org, repo, pushed_at, scanned_at) VALUES (?, ?, ?, ?)',
+                [(org.lower(), repo['name'], repo.get('pushed_at'), scanned_at) for repo in repos]
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error as e:
+                log_error(f'Error closing scan state: {str(e)}')
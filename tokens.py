@@ -0,0 +1,78 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from utils import log_error
+
+
+class RateLimit:
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.lock = threading.Lock()
+
+    def seconds_until_reset(self):
+        if self.reset is None:
+            return 0
+        return max(0, self.reset - time.time())
+
+
+class TokenPool:
+    RESOURCES = ('core', 'search', 'graphql')
+
+    def __init__(self, tokens=None, reserve=1):
+        self.tokens = list(dict.fromkeys(token.strip() for token in tokens or [] if token and token.strip())) or [None]
+        self.reserve = reserve
+        self.rate_limits = {token: {resource: RateLimit() for resource in self.RESOURCES} for token in self.tokens}
+        self.active = dict.fromkeys(self.tokens, 0)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, value='', path=None, reserve=1):
+        tokens = value.split(',') if value else []
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    tokens.extend(line.strip() for line in f if line.strip() and not line.strip().startswith('#'))
+            except OSError as e:
+                log_error(f'Error loading GitHub tokens from {path}: {str(e)}')
+                return None
+        return cls(tokens, reserve)
+
+    def __len__(self):
+        return len([token for token in self.tokens if token])
+
+    def rate_limit(self, token, resource):
+        return self.rate_limits[token].get(resource)
+
+    def _score(self, token, resource):
+        rate_limit = self.rate_limits[token][resource]
+        wait = rate_limit.seconds_until_reset()
+        remaining = float('inf') if rate_limit.remaining is None or wait <= 0 else rate_limit.remaining
+        return remaining > self.reserve, remaining, -self.active[token], -wait
+
+    def suspend(self, token, resource, seconds):
+        rate_limit = self.rate_limits[token][resource]
+        with rate_limit.lock:
+            rate_limit.remaining = 0
+            rate_limit.reset = time.time() + seconds
+
+    def available(self, resource='core'):
+        with self.lock:
+            return sum(1 for token in self.tokens if self._score(token, resource)[0])
+
+    def acquire(self, resource='core'):
+        with self.lock:
+            return max(self.tokens, key=lambda token: self._score(token, resource))
+
+    @contextmanager
+    def lease(self, resource='core'):
+        with self.lock:
+            token = max(self.tokens, key=lambda token: self._score(token, resource))
+            self.active[token] += 1
+        try:
+            yield token
+        finally:
+            with self.lock:
+                self.active[token] -= 1
@@ -1,7 +1,5 @@
 import sys
-import termios
 import time
-import tty
 
 from config import Colors
 
@@ -19,6 +17,8 @@ def get_arrow_key_selection(orgs, best_match_index):
         print(f'      ... and {len(orgs) - 10} more')
 
     fd = sys.stdin.fileno()
+    import termios
+    import tty
     old_settings = termios.tcgetattr(fd)
     start_time = time.time()
 
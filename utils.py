@@ -1,4 +1,4 @@
-import json
+import glob
 import os
 import sys
 from datetime import datetime
@@ -10,34 +10,47 @@ def log_error(message):
     with open('ghoss/errorlogs.txt', 'a', encoding='utf-8') as f:
         f.write(f'[{datetime.now().isoformat()}] {message}\n')
 
-def save_results_to_files(th_secrets, kf_secrets, combined_results, th_output_filename, kf_output_filename, combined_output_filename):
+def load_org_mapping(path):
+    mapping = {}
     try:
-        os.makedirs(os.path.dirname(th_output_filename), exist_ok=True)
-        os.makedirs(os.path.dirname(kf_output_filename), exist_ok=True)
-        os.makedirs(os.path.dirname(combined_output_filename), exist_ok=True)
-        with open(th_output_filename, 'w', encoding='utf-8') as f:
-            json.dump(th_secrets, f, indent=2, ensure_ascii=False)
-        with open(kf_output_filename, 'w', encoding='utf-8') as f:
-            json.dump(kf_secrets, f, indent=2, ensure_ascii=False)
-        with open(combined_output_filename, 'w', encoding='utf-8') as f:
-            json.dump(combined_results, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        log_error(f'Error saving results: {str(e)}')
-        print(f'[!] Failed to save results')
-        return False
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if '=' not in line:
+                    log_error(f'Invalid mapping on line {line_number} of {path}: {line[:100]}')
+                    continue
+                name, login = line.rsplit('=', 1)
+                if name.strip() and login.strip():
+                    mapping[name.strip()] = login.strip()
+        return mapping
+    except OSError as e:
+        log_error(f'Error loading organization mapping {path}: {str(e)}')
+        return None
+
+def wait_process(process):
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
 
 def cleanup_temp_files(temp_files):
-    for temp_file in temp_files:
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except Exception as e:
-                log_error(f'Failed to delete temporary file {temp_file}: {str(e)}')
-                print(f'[!] Failed to delete temporary file')
+    for path in list(temp_files):
+        base, ext = os.path.splitext(path)
+        for temp_file in [path] + glob.glob(f'{glob.escape(base)}_*{ext}'):
+            if os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except Exception as e:
+                    log_error(f'Failed to delete temporary file {temp_file}: {str(e)}')
+                    print(f'[!] Failed to delete temporary file')
 
-def signal_handler(sig, frame, temp_files):
+def signal_handler(sig, frame, temp_files, scanner=None, executors=()):
     sys.stdout.write('\r\033[K')
     print(f'[!] Scan was interrupted...')
+    if scanner:
+        scanner.kill_processes()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
     cleanup_temp_files(temp_files)
     sys.exit(1)
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from utils import log_error
+
+
+class WorkQueue:
+    LEASE_SECONDS = 300
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, root, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.root = os.path.abspath(root)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(self.root, 'queue.db'), check_same_thread=False, timeout=60, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=DELETE')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS runs ('
+            'run_id TEXT PRIMARY KEY, source TEXT, total INTEGER NOT NULL, created_at TEXT NOT NULL)'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'run_id TEXT NOT NULL, idx INTEGER NOT NULL, organization TEXT NOT NULL, '
+            "status TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+            'PRIMARY KEY (run_id, idx))'
+        )
+
+    def results_dir(self, run_id):
+        path = os.path.join(self.root, 'results', run_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _write(self, sql, params=()):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = self.conn.execute(sql, params)
+                self.conn.execute('COMMIT')
+                return cursor.rowcount
+            except sqlite3.Error:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def enqueue(self, run_id, organizations, source=None):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute(
+                    'INSERT INTO runs (run_id, source, total, created_at) VALUES (?, ?, ?, ?)',
+                    (run_id, source, len(organizations), datetime.now().isoformat())
+                )
+                self.conn.executemany(
+                    'INSERT INTO jobs (run_id, idx, organization) VALUES (?, ?, ?)',
+                    [(run_id, index, organization) for index, organization in enumerate(organizations)]
+                )
+                self.conn.execute('COMMIT')
+            except sqlite3.Error:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def run(self, run_id=None):
+        with self.lock:
+            if run_id:
+                row = self.conn.execute('SELECT run_id, source, total FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT run_id, source, total FROM runs WHERE run_id IN (SELECT run_id FROM jobs WHERE status IN ('pending', 'leased')) "
+                    'ORDER BY created_at LIMIT 1'
+                ).fetchone()
+        return {'run_id': row[0], 'source': row[1], 'total': row[2]} if row else None
+
+    def organizations(self, run_id):
+        with self.lock:
+            return [row[0] for row in self.conn.execute('SELECT organization FROM jobs WHERE run_id = ? ORDER BY idx', (run_id,))]
+
+    def claim(self, run_id, worker):
+        now = time.time()
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', worker = NULL, lease_expires = NULL "
+                    "WHERE run_id = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (run_id, now, self.max_attempts)
+                )
+                row = self.conn.execute(
+                    "SELECT idx, organization FROM jobs WHERE run_id = ? AND "
+                    "(status = 'pending' OR (status = 'leased' AND lease_expires < ?)) ORDER BY idx LIMIT 1",
+                    (run_id, now)
+                ).fetchone()
+                if row:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                        'WHERE run_id = ? AND idx = ?',
+                        (worker, now + self.lease_seconds, run_id, row[0])
+                    )
+                self.conn.execute('COMMIT')
+            except sqlite3.Error:
+                self.conn.execute('ROLLBACK')
+                raise
+        return row
+
+    def renew(self, run_id, indexes, worker):
+        if not indexes:
+            return
+        placeholders = ','.join('?' * len(indexes))
+        self._write(
+            f"UPDATE jobs SET lease_expires = ? WHERE run_id = ? AND worker = ? AND status = 'leased' AND idx IN ({placeholders})",
+            (time.time() + self.lease_seconds, run_id, worker, *indexes)
+        )
+
+    def complete(self, run_id, index, worker):
+        updated = self._write(
+            "UPDATE jobs SET status = 'done', lease_expires = NULL WHERE run_id = ? AND idx = ? AND worker = ? AND status = 'leased'",
+            (run_id, index, worker)
+        )
+        if not updated:
+            log_error(f'Lease on organization {index} of run {run_id} was lost before {worker} completed it')
+        return bool(updated)
+
+    def release(self, run_id, index, worker):
+        return bool(self._write(
+            "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL, attempts = MAX(attempts - 1, 0) "
+            "WHERE run_id = ? AND idx = ? AND worker = ? AND status = 'leased'",
+            (run_id, index, worker)
+        ))
+
+    def counts(self, run_id):
+        with self.lock:
+            counts = dict(self.conn.execute('SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status', (run_id,)).fetchall())
+            active = self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND status = 'leased' AND lease_expires >= ?", (run_id, time.time())
+            ).fetchone()[0]
+        counts['active'] = active
+        return counts
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error as e:
+                log_error(f'Error closing work queue: {str(e)}')